@@ -0,0 +1,208 @@
+"""
+Локальная заглушка сервера дневника для нагрузочных тестов.
+
+Отвечает на те же эндпоинты, что вызывает ``Parser`` из dnevnik_api, с настраиваемой задержкой,
+размером ответа и долей ошибок. Ответы генерируются один раз при запуске, чтобы сама заглушка
+не становилась узким местом.
+
+Запуск::
+
+    python fake_upstream.py --port 9000 --latency 0.15 --jitter 0.05 --size 12 --error-rate 0.01
+
+После этого dnevnik_api запускается с ``DNEVNIK_URL = "http://localhost:9000"`` в config.py.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+from collections import Counter
+from datetime import date, timedelta
+
+from aiohttp import web
+
+DISCIPLINES: tuple[str, ...] = (
+    "Алгебра",
+    "Геометрия",
+    "Русский язык",
+    "Литература",
+    "Английский язык",
+    "История",
+    "Обществознание",
+    "Физика",
+    "Химия",
+    "Биология",
+    "География",
+    "Информатика",
+    "Физическая культура",
+    "ОБЗР",
+)
+
+
+class FakeUpstream:
+    """Заглушка эндпоинтов ``/api/*`` сервера дневника.
+
+    :param latency: средняя задержка ответа в секундах
+    :param jitter: разброс задержки в секундах, задержка выбирается равномерно в ``latency ± jitter``
+    :param size: число предметов в ответах, от него зависит размер ответов
+    :param error_rate: доля ответов с кодом 500
+    :param seed: зерно генератора случайных чисел для воспроизводимых прогонов
+    """
+
+    def __init__(
+        self, latency: float = 0.1, jitter: float = 0.0, size: int = 10, error_rate: float = 0.0, seed: int = 0
+    ) -> None:
+        self.__latency: float = latency
+        self.__jitter: float = jitter
+        self.__error_rate: float = error_rate
+        self.__random: random.Random = random.Random(seed)
+        self.__payloads: dict[str, bytes] = self.__build_payloads(size)
+        self.__requests: Counter[str] = Counter()
+        self.__errors: Counter[str] = Counter()
+
+    def __build_payloads(self, size: int) -> dict[str, bytes]:
+        today: date = date.today()
+        monday: date = today - timedelta(days=today.weekday())
+        disciplines: list[str] = [DISCIPLINES[index % len(DISCIPLINES)] for index in range(size)]
+
+        def marks() -> list[dict]:
+            return [
+                {"mark": self.__random.randint(2, 5), "date": str(today - timedelta(days=self.__random.randint(0, 60)))}
+                for _ in range(self.__random.randint(3, 12))
+            ]
+
+        def lessons(day: date) -> list[dict]:
+            return [
+                {
+                    "discipline": discipline,
+                    "teacher": f"Учитель {index + 1}",
+                    "office": str(100 + index),
+                    "time_begin": f"{8 + index}:30",
+                    "time_end": f"{9 + index}:10",
+                    "homework": f"Задание по предмету {discipline} на {day}",
+                    "marks": [],
+                }
+                for index, discipline in enumerate(disciplines[:7])
+            ]
+
+        payloads: dict = {
+            "GetPersonData": {
+                "user_fullname": "Иванов Иван Иванович",
+                "selected_pupil_school": "МБОУ СОШ № 1",
+                "user_has_ava": True,
+                "phone": "+79990000000",
+            },
+            "GetSummaryMarks": {
+                "summary_marks_data": [
+                    {
+                        "discipline_marks": [
+                            {
+                                "discipline": discipline,
+                                "average_mark": round(self.__random.uniform(3.0, 5.0), 2),
+                                "marks": marks(),
+                            }
+                            for discipline in disciplines
+                        ]
+                    }
+                ]
+            },
+            "GetDiary": {
+                "days": [
+                    {"date": str(monday + timedelta(days=offset)), "lessons": lessons(monday + timedelta(days=offset))}
+                    for offset in range(6)
+                ]
+            },
+            "GetWeekSchedule": {
+                "days": [
+                    {
+                        "date": str(monday + timedelta(days=offset)),
+                        "is_weekend": offset >= 5,
+                        "lessons": [] if offset >= 5 else lessons(monday + timedelta(days=offset)),
+                    }
+                    for offset in range(7)
+                ]
+            },
+            "getSchoolInfo": {
+                "name": "МБОУ СОШ № 1",
+                "address": "г. Ростов-на-Дону, ул. Школьная, 1",
+                "phone": "+78630000000",
+                "site_url": "https://school.example",
+                "count_employees": 80,
+                "count_pupils": 1200,
+                "email": "school@example.com",
+            },
+            "GetHomeworkFromRange": {
+                "homeworks": [
+                    {"discipline": discipline, "date": str(today + timedelta(days=1)), "text": f"Параграф {index + 1}"}
+                    for index, discipline in enumerate(disciplines)
+                ]
+            },
+            "GetMissedLessons": {
+                "missed_lessons": [
+                    {"discipline": discipline, "date": str(today - timedelta(days=index)), "reason": "Болезнь"}
+                    for index, discipline in enumerate(disciplines[: size // 3])
+                ]
+            },
+        }
+        return {
+            name: json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode()
+            for name, payload in payloads.items()
+        }
+
+    async def __handle(self, request: web.Request) -> web.Response:
+        name: str = request.match_info["method"]
+        payload: bytes | None = self.__payloads.get(name)
+        if payload is None:
+            raise web.HTTPNotFound()
+        self.__requests[name] += 1
+        if "sessionid" not in request.cookies:
+            self.__errors[name] += 1
+            raise web.HTTPUnauthorized()
+
+        delay: float = self.__latency + self.__random.uniform(-self.__jitter, self.__jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if self.__random.random() < self.__error_rate:
+            self.__errors[name] += 1
+            raise web.HTTPInternalServerError()
+        return web.Response(body=payload, content_type="application/json")
+
+    async def __stats(self, _: web.Request) -> web.Response:
+        return web.json_response(
+            {
+                "requests": dict(self.__requests),
+                "errors": dict(self.__errors),
+                "payload_bytes": {name: len(payload) for name, payload in self.__payloads.items()},
+            }
+        )
+
+    async def __reset(self, _: web.Request) -> web.Response:
+        self.__requests.clear()
+        self.__errors.clear()
+        return web.json_response(True)
+
+    def get_app(self) -> web.Application:
+        app: web.Application = web.Application()
+        app.router.add_route("*", "/api/{service}/{method}", self.__handle)
+        app.router.add_get("/stats", self.__stats)
+        app.router.add_post("/stats/reset", self.__reset)
+        return app
+
+
+def main() -> None:
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description="Заглушка сервера дневника")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency", type=float, default=0.1, help="средняя задержка ответа, секунды")
+    parser.add_argument("--jitter", type=float, default=0.0, help="разброс задержки, секунды")
+    parser.add_argument("--size", type=int, default=10, help="число предметов в ответах")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="доля ответов с кодом 500")
+    parser.add_argument("--seed", type=int, default=0)
+    args: argparse.Namespace = parser.parse_args()
+
+    upstream: FakeUpstream = FakeUpstream(args.latency, args.jitter, args.size, args.error_rate, args.seed)
+    web.run_app(upstream.get_app(), host=args.host, port=args.port, access_log=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,7 @@
 
 from os import environ
 from json import loads
+import httpx
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from uvicorn import Config, Server
@@ -11,19 +12,64 @@ from sqlalchemy.ext.asyncio import async_sessionmaker
 
 from routers import abstract
 from routers import ping
+from routers import status
+from routers import events
+from routers import metrics
+from routers import stats
 from routers.admin import admin
 from routers.user import dnevnik, login
 
 from utils.logger import Logger
+from utils import tracing
 from src.db import AbstractDb, Database
 from src.api import DnevnikApi, LoginApi
+from src.circuit_breaker import CircuitBreaker
+from src.cookie_cache import UserCookieCache
+from src.dataset_store import DatasetStore
+from src.mark_events import MarkNotifier
+from src.prefetch import ActivityTracker, PrefetchScheduler
 
 
+import config
 from config import PARSER_IP, LOGGING_LEVEL, HOST, PORT, TIMEOUT, DB_DATA
 
 
+# Настройки, добавленные после первого выпуска, необязательны: если их нет в config.py, берутся значения по умолчанию
+PATH_TIMEOUTS: dict[str, float] = getattr(config, "PATH_TIMEOUTS", {})
+HTTP_MAX_CONNECTIONS: int = getattr(config, "HTTP_MAX_CONNECTIONS", 100)
+HTTP_MAX_KEEPALIVE: int = getattr(config, "HTTP_MAX_KEEPALIVE", 20)
+BREAKER_FAILURE_THRESHOLD: int = getattr(config, "BREAKER_FAILURE_THRESHOLD", CircuitBreaker.DEFAULT_FAILURE_THRESHOLD)
+BREAKER_RECOVERY_TIMEOUT: float = getattr(config, "BREAKER_RECOVERY_TIMEOUT", CircuitBreaker.DEFAULT_RECOVERY_TIMEOUT)
+COOKIE_CACHE_SIZE: int = getattr(config, "COOKIE_CACHE_SIZE", UserCookieCache.DEFAULT_MAX_SIZE)
+COOKIE_CACHE_TTL: float = getattr(config, "COOKIE_CACHE_TTL", UserCookieCache.DEFAULT_TTL)
+COOKIE_CACHE_NEGATIVE_TTL: float = getattr(config, "COOKIE_CACHE_NEGATIVE_TTL", UserCookieCache.DEFAULT_NEGATIVE_TTL)
+DATASET_MAX_AGE: float = getattr(config, "DATASET_MAX_AGE", DatasetStore.DEFAULT_MAX_AGE)
+DATASET_TOUCH_INTERVAL: float = getattr(config, "DATASET_TOUCH_INTERVAL", DatasetStore.DEFAULT_TOUCH_INTERVAL)
+PREFETCH_INTERVAL: float = getattr(config, "PREFETCH_INTERVAL", PrefetchScheduler.DEFAULT_INTERVAL)
+PREFETCH_WINDOWS: tuple[tuple[int, int], ...] = getattr(config, "PREFETCH_WINDOWS", PrefetchScheduler.DEFAULT_WINDOWS)
+PREFETCH_CONCURRENCY: int = getattr(config, "PREFETCH_CONCURRENCY", PrefetchScheduler.DEFAULT_CONCURRENCY)
+PREFETCH_UPSTREAM_RPS: float = getattr(config, "PREFETCH_UPSTREAM_RPS", PrefetchScheduler.DEFAULT_UPSTREAM_RPS)
+PREFETCH_UPSTREAM_SHARE: float = getattr(config, "PREFETCH_UPSTREAM_SHARE", PrefetchScheduler.DEFAULT_UPSTREAM_SHARE)
+LOG_PATH: str = getattr(config, "LOG_PATH", "app.log")
+LOG_MAX_BYTES: int = getattr(config, "LOG_MAX_BYTES", 10 * 1024 * 1024)
+LOG_BACKUP_COUNT: int = getattr(config, "LOG_BACKUP_COUNT", 5)
+LOG_ROTATE_WHEN: str | None = getattr(config, "LOG_ROTATE_WHEN", None)
+LOG_JSON: bool = getattr(config, "LOG_JSON", False)
+LOG_SAMPLE_INTERVAL: float = getattr(config, "LOG_SAMPLE_INTERVAL", 0.0)
+TRACE_PATH: str | None = getattr(config, "TRACE_PATH", None)
+
+
 async def main() -> None:
-    Logger(LOGGING_LEVEL)
+    Logger(
+        LOGGING_LEVEL,
+        path=LOG_PATH,
+        max_bytes=LOG_MAX_BYTES,
+        backup_count=LOG_BACKUP_COUNT,
+        when=LOG_ROTATE_WHEN,
+        json_format=LOG_JSON,
+        sample_interval=LOG_SAMPLE_INTERVAL,
+    )
+    tracing.configure("controller", TRACE_PATH)
 
     app: FastAPI = FastAPI()
     app.add_middleware(
@@ -37,22 +83,60 @@ async def main() -> None:
     db: AbstractDb = Database(DB_DATA)
     await db.create_tables()
     session_factory: async_sessionmaker = await db.get_session_factory()
+    cookie_cache: UserCookieCache = UserCookieCache(COOKIE_CACHE_SIZE, COOKIE_CACHE_TTL, COOKIE_CACHE_NEGATIVE_TTL)
+
+    client: httpx.AsyncClient = httpx.AsyncClient(
+        timeout=TIMEOUT,
+        limits=httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS, max_keepalive_connections=HTTP_MAX_KEEPALIVE),
+    )
+    dnevnik_breaker: CircuitBreaker = CircuitBreaker("dnevnik", BREAKER_FAILURE_THRESHOLD, BREAKER_RECOVERY_TIMEOUT)
+    login_breaker: CircuitBreaker = CircuitBreaker("login", BREAKER_FAILURE_THRESHOLD, BREAKER_RECOVERY_TIMEOUT)
+
+    dnevnik_api: DnevnikApi = DnevnikApi(PARSER_IP, TIMEOUT, client, dnevnik_breaker, PATH_TIMEOUTS)
+    login_api: LoginApi = LoginApi(PARSER_IP, TIMEOUT, client, login_breaker, PATH_TIMEOUTS)
 
-    dnevnik_api: DnevnikApi = DnevnikApi(PARSER_IP, TIMEOUT)
-    login_api: LoginApi = LoginApi(PARSER_IP, TIMEOUT)
+    activity: ActivityTracker = ActivityTracker()
+    notifier: MarkNotifier = MarkNotifier(session_factory)
+    dataset_store: DatasetStore = DatasetStore(
+        session_factory, notifier, max_age=DATASET_MAX_AGE, touch_interval=DATASET_TOUCH_INTERVAL
+    )
+    prefetch: PrefetchScheduler = PrefetchScheduler(
+        dnevnik_api,
+        session_factory,
+        cookie_cache,
+        activity,
+        dataset_store,
+        interval=PREFETCH_INTERVAL,
+        windows=PREFETCH_WINDOWS,
+        concurrency=PREFETCH_CONCURRENCY,
+        upstream_rps=PREFETCH_UPSTREAM_RPS,
+        upstream_share=PREFETCH_UPSTREAM_SHARE,
+    )
 
     routers: tuple[abstract.AbstractRouter, ...] = (
         ping.Router(),
+        status.Router((dnevnik_breaker, login_breaker)),
         admin.Router(session_factory),
-        dnevnik.DnevnikRouter(dnevnik_api, session_factory),
-        login.LoginRouter(login_api, session_factory),
+        stats.Router(cookie_cache, dataset_store, prefetch, notifier),
+        events.Router(notifier),
+        dnevnik.DnevnikRouter(dnevnik_api, session_factory, cookie_cache, activity, dataset_store),
+        login.LoginRouter(login_api, session_factory, cookie_cache),
     )
-    for router in routers:
+    metrics_router: metrics.Router = metrics.Router()
+    for router in (*routers, metrics_router):
         app.include_router(router.get_router())
+    metrics_router.set_routes({route.path for route in app.routes})
+    app.middleware("http")(metrics_router.middleware)
 
-    config = Config(app, host=HOST, port=PORT)
-    server = Server(config=config)
-    await server.serve()
+    server_config: Config = Config(app, host=HOST, port=PORT)
+    server: Server = Server(config=server_config)
+    await prefetch.start()
+    try:
+        await server.serve()
+    finally:
+        await prefetch.close()
+        await client.aclose()
+        tracing.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,45 @@
+from datetime import date, datetime
+
+from sqlalchemy import Date, DateTime, ForeignKey, Integer, String
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from models.db_models.base import Base
+
+
+class Snapshot(Base):
+    __tablename__ = "snapshot"
+
+    user_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey("user.id", ondelete="CASCADE"),
+        primary_key=True,
+        doc="Идентификатор пользователя",
+    )
+
+    dataset: Mapped[str] = mapped_column(
+        String(64),
+        primary_key=True,
+        doc="Название набора данных дневника, например get_summary_marks",
+    )
+
+    day: Mapped[date] = mapped_column(
+        Date,
+        primary_key=True,
+        doc="День, за который получены данные",
+    )
+
+    payload: Mapped[dict] = mapped_column(
+        JSONB,
+        doc="Ответ сервера дневника",
+    )
+
+    content_hash: Mapped[str] = mapped_column(
+        String(64),
+        doc="SHA-256 ответа сервера дневника в том виде, в каком он получен",
+    )
+
+    fetched_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        doc="Время получения данных с сервера дневника",
+    )
@@ -0,0 +1,20 @@
+from routers.base import BaseRouter
+from src.mark_events import MarkNotifier
+
+
+class Router(BaseRouter):
+    DEFAULT_WAIT: float = 25.0
+
+    def __init__(self, notifier: MarkNotifier, prefix: str = "/events") -> None:
+        self.__notifier: MarkNotifier = notifier
+        register_paths: tuple = (
+            ("/marks", self.__get_mark_events, ["GET"]),
+            ("/marks/last_seq", self.__get_last_seq, ["GET"]),
+        )
+        super().__init__(register_paths, prefix)
+
+    async def __get_mark_events(self, after: int = 0, wait: float = DEFAULT_WAIT) -> list[dict]:
+        return await self.__notifier.get_events(after, min(wait, self.DEFAULT_WAIT))
+
+    async def __get_last_seq(self) -> int:
+        return self.__notifier.get_last_seq()
@@ -0,0 +1,45 @@
+from typing import Awaitable, Callable
+
+from fastapi import Request, Response
+from fastapi.responses import PlainTextResponse
+
+from routers.base import BaseRouter
+from utils.metrics import REGISTRY, Instrument
+from utils.tracing import TRACEPARENT_HEADER, Trace, get_server_timing, trace_context
+
+HTTP_REQUESTS: Instrument = Instrument("http_request", "Запросы к API", ("route", "method"))
+
+
+class Router(BaseRouter):
+    """Метрики сервиса в текстовом формате Prometheus и middleware, замеряющее запросы к API.
+
+    Middleware также продолжает трассировку из заголовка ``traceparent`` и возвращает
+    длительности спанов запроса в заголовке ``Server-Timing``.
+    """
+
+    def __init__(self, prefix: str = "/metrics") -> None:
+        self.__prefix: str = prefix
+        self.__routes: set[str] = set()
+        register_paths: tuple = (("", self.__get_metrics, ["GET"]),)
+        super().__init__(register_paths, prefix)
+
+    async def __get_metrics(self) -> PlainTextResponse:
+        return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+    def set_routes(self, routes: set[str]) -> None:
+        """Известные пути API, остальные запросы учитываются под меткой ``other``."""
+        self.__routes = routes
+
+    async def middleware(self, request: Request, call_next: Callable[[Request], Awaitable[Response]]) -> Response:
+        route: str = request.url.path if request.url.path in self.__routes else "other"
+        if route == self.__prefix:
+            return await call_next(request)
+        trace: Trace
+        with trace_context(request.headers.get(TRACEPARENT_HEADER)) as trace:
+            with HTTP_REQUESTS.track(route=route, method=request.method):
+                response: Response = await call_next(request)
+        if response.status_code >= 500:
+            HTTP_REQUESTS.errors.inc(route=route, method=request.method)
+        response.headers["Server-Timing"] = get_server_timing(trace)
+        response.headers["X-Trace-Id"] = trace.trace_id
+        return response
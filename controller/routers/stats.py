@@ -0,0 +1,39 @@
+from routers.base import BaseRouter
+from src.cookie_cache import UserCookieCache
+from src.dataset_store import DatasetStore
+from src.mark_events import MarkNotifier
+from src.prefetch import PrefetchScheduler
+
+
+class Router(BaseRouter):
+    def __init__(
+        self,
+        cookie_cache: UserCookieCache,
+        store: DatasetStore,
+        prefetch: PrefetchScheduler,
+        notifier: MarkNotifier,
+        prefix: str = "/stats",
+    ) -> None:
+        self.__cookie_cache: UserCookieCache = cookie_cache
+        self.__store: DatasetStore = store
+        self.__prefetch: PrefetchScheduler = prefetch
+        self.__notifier: MarkNotifier = notifier
+        register_paths: tuple = (
+            ("/cookie_cache", self.__get_cookie_cache_stats, ["GET"]),
+            ("/dataset_store", self.__get_dataset_store_stats, ["GET"]),
+            ("/prefetch", self.__get_prefetch_stats, ["GET"]),
+            ("/mark_events", self.__get_mark_events_stats, ["GET"]),
+        )
+        super().__init__(register_paths, prefix)
+
+    async def __get_cookie_cache_stats(self) -> dict:
+        return self.__cookie_cache.get_stats()
+
+    async def __get_dataset_store_stats(self) -> dict:
+        return self.__store.get_stats()
+
+    async def __get_prefetch_stats(self) -> dict:
+        return self.__prefetch.get_stats()
+
+    async def __get_mark_events_stats(self) -> dict:
+        return self.__notifier.get_stats()
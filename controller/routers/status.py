@@ -0,0 +1,14 @@
+from routers.base import BaseRouter
+from src.circuit_breaker import CircuitBreaker, CircuitState
+
+
+class Router(BaseRouter):
+    def __init__(self, breakers: tuple[CircuitBreaker, ...], prefix: str = "/status") -> None:
+        self.__breakers: dict[str, CircuitBreaker] = {breaker.name: breaker for breaker in breakers}
+        register_paths: tuple = (("", self.__get_status, ["GET"]),)
+        super().__init__(register_paths, prefix)
+
+    async def __get_status(self) -> dict:
+        services: dict[str, dict] = {name: breaker.get_stats() for name, breaker in self.__breakers.items()}
+        degraded: bool = any(stats["state"] != CircuitState.CLOSED.value for stats in services.values())
+        return {"degraded": degraded, "services": services}
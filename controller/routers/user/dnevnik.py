@@ -1,12 +1,16 @@
 from typing import Optional, Callable, cast
 from functools import wraps
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Response
 from sqlalchemy.ext.asyncio import async_sessionmaker
 
 from routers.base import BaseRouter
 from models.api_models.user_data import UserData
+from models.api_models.bundle_data import BundleData
 from src.api import DnevnikApi
 from services.user_service import UserService
+from src.cookie_cache import UserCookieCache
+from src.dataset_store import DatasetStore, StoredDataset
+from src.prefetch import ActivityTracker
 
 
 def require_cookies(endpoint: Callable) -> Callable:
@@ -22,9 +26,19 @@ def require_cookies(endpoint: Callable) -> Callable:
 
 
 class DnevnikRouter(BaseRouter):
-    def __init__(self, parser: DnevnikApi, session_factory: async_sessionmaker, prefix: str = "/dnevnik") -> None:
+    def __init__(
+        self,
+        parser: DnevnikApi,
+        session_factory: async_sessionmaker,
+        cookie_cache: UserCookieCache,
+        activity: ActivityTracker,
+        store: DatasetStore,
+        prefix: str = "/dnevnik",
+    ) -> None:
         self.__parser: DnevnikApi = parser
-        self._user_service: UserService = UserService(session_factory)
+        self._user_service: UserService = UserService(session_factory, cookie_cache)
+        self.__activity: ActivityTracker = activity
+        self.__store: DatasetStore = store
 
         register_paths: tuple = (
             ("/get_person_data", self.__get_person_data, ["POST"]),
@@ -34,34 +48,60 @@ class DnevnikRouter(BaseRouter):
             ("/get_school_info", self.__get_school_info, ["POST"]),
             ("/get_homework_from_range", self.__get_homework_from_range, ["POST"]),
             ("/get_missed_lessons", self.__get_missed_lessons, ["POST"]),
+            ("/bundle", self.__get_bundle, ["POST"]),
         )
 
         super().__init__(register_paths, prefix)
 
+    @staticmethod
+    def __json_response(content: bytes | None, headers: dict[str, str] | None = None) -> Response:
+        """Передаёт JSON от сервиса дневника без разбора, ``null``, если данных нет."""
+        return Response(content if content is not None else b"null", media_type="application/json", headers=headers)
+
+    async def __stored(self, dataset: str, parser_method: Callable, data: UserData) -> Response:
+        self.__activity.touch(data.id)
+        stored: StoredDataset | None = await self.__store.get(data.id, dataset)
+        if stored is None:
+            content: bytes | None = await parser_method(data)
+            if content is None:
+                return self.__json_response(None)
+            stored = await self.__store.set(data.id, dataset, content)
+        headers: dict[str, str] = {"Age": str(int(stored.get_age())), "X-Fetched-At": stored.fetched_at.isoformat()}
+        return self.__json_response(stored.content, headers)
+
+    @require_cookies
+    async def __get_person_data(self, data: UserData) -> Response:
+        self.__activity.touch(data.id)
+        return self.__json_response(await self.__parser.get_person_data(data))
+
     @require_cookies
-    async def __get_person_data(self, data: UserData) -> dict | None:
-        return await self.__parser.get_person_data(data)
+    async def __get_summary_marks(self, data: UserData) -> Response:
+        return await self.__stored("get_summary_marks", self.__parser.get_summary_marks, data)
 
     @require_cookies
-    async def __get_summary_marks(self, data: UserData) -> dict | None:
-        return await self.__parser.get_summary_marks(data)
+    async def __get_diary(self, data: UserData) -> Response:
+        return await self.__stored("get_diary", self.__parser.get_diary, data)
 
     @require_cookies
-    async def __get_diary(self, data: UserData) -> dict | None:
-        return await self.__parser.get_diary(data)
+    async def __get_week_schedule(self, data: UserData) -> Response:
+        return await self.__stored("get_week_schedule", self.__parser.get_week_schedule, data)
 
     @require_cookies
-    async def __get_week_schedule(self, data: UserData) -> dict | None:
-        return await self.__parser.get_week_schedule(data)
+    async def __get_school_info(self, data: UserData) -> Response:
+        self.__activity.touch(data.id)
+        return self.__json_response(await self.__parser.get_school_info(data))
 
     @require_cookies
-    async def __get_school_info(self, data: UserData) -> dict | None:
-        return await self.__parser.get_school_info(data)
+    async def __get_homework_from_range(self, data: UserData) -> Response:
+        self.__activity.touch(data.id)
+        return self.__json_response(await self.__parser.get_homework_from_range(data))
 
     @require_cookies
-    async def __get_homework_from_range(self, data: UserData) -> dict | None:
-        return await self.__parser.get_homework_from_range(data)
+    async def __get_missed_lessons(self, data: UserData) -> Response:
+        self.__activity.touch(data.id)
+        return self.__json_response(await self.__parser.get_missed_lessons(data))
 
     @require_cookies
-    async def __get_missed_lessons(self, data: UserData) -> dict | None:
-        return await self.__parser.get_missed_lessons(data)
+    async def __get_bundle(self, data: BundleData) -> Response:
+        self.__activity.touch(data.id)
+        return self.__json_response(await self.__parser.get_bundle(data))
@@ -5,14 +5,21 @@ from sqlalchemy.ext.asyncio import async_sessionmaker
 from routers.base import BaseRouter
 from models.api_models.user_data import UserData
 from services.user_service import UserService
+from src.cookie_cache import UserCookieCache
 from src.api import LoginApi
 from services.user_service import User
 
 
 class LoginRouter(BaseRouter):
-    def __init__(self, parser: LoginApi, session_factory: async_sessionmaker, prefix: str = "/login") -> None:
+    def __init__(
+        self,
+        parser: LoginApi,
+        session_factory: async_sessionmaker,
+        cookie_cache: UserCookieCache,
+        prefix: str = "/login",
+    ) -> None:
         self.__parser: LoginApi = parser
-        self.__user_service: UserService = UserService(session_factory)
+        self.__user_service: UserService = UserService(session_factory, cookie_cache)
 
         register_paths: tuple = (
             ("/login", self.__login, ["POST"]),
@@ -29,8 +36,7 @@ class LoginRouter(BaseRouter):
         if not data.sms_code:
             raise HTTPException(status_code=401, detail="sms code are required")
         cookies: dict | None = await self.__parser.sms_login(data)
+        if cookies is None:
+            return False
         data.cookies = cookies
-        if await self.__user_service.user_exist(data):
-            return await self.__user_service.change_user_cookies(data)
-        else:
-            return await self.__user_service.new_user(data)
+        return await self.__user_service.upsert_user_cookies(data) is not None
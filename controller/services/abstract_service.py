@@ -1,6 +1,10 @@
 import abc
 from sqlalchemy.ext.asyncio import async_sessionmaker
 
+from utils.metrics import Instrument
+
+DB_QUERIES: Instrument = Instrument("db_query", "Запросы к базе", ("service", "query"))
+
 
 class AbstractService(abc.ABC):
     def __init__(self, session_factory: async_sessionmaker) -> None:
@@ -4,7 +4,7 @@ from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncSession
 from sqlalchemy import Result, select
 from sqlalchemy.exc import SQLAlchemyError
 
-from services.abstract_service import AbstractService
+from services.abstract_service import AbstractService, DB_QUERIES
 from models.api_models.admin_data import AdminData
 from models.db_models.admin import Admin
 
@@ -13,15 +13,18 @@ class AdminService(AbstractService):
     def __init__(self, session_factory: async_sessionmaker[AsyncSession]) -> None:
         self.__session_factory: async_sessionmaker[AsyncSession] = session_factory
 
+    @DB_QUERIES.wrap("admin", "get_admins")
     async def get_admins(self) -> list[AdminData]:
         async with self.__session_factory() as session:
             try:
                 result: Result[Tuple[Admin]] = await session.execute(select(Admin))
                 return [AdminData(**user.to_dict()) for user in result.scalars().all()]
             except SQLAlchemyError as e:
+                DB_QUERIES.errors.inc(service="admin", query="get_admins")
                 logging.error("Database error occurred while fetching cards: %s", e)
                 return []
 
+    @DB_QUERIES.wrap("admin", "new_admin")
     async def new_admin(self, data: AdminData) -> bool:
         async with self.__session_factory() as session:
             try:
@@ -34,10 +37,12 @@ class AdminService(AbstractService):
                     return True
                 return False
             except SQLAlchemyError as e:
+                DB_QUERIES.errors.inc(service="admin", query="new_admin")
                 await session.rollback()
                 logging.error("Database error occurred while adding admin: %s", e)
                 return False
 
+    @DB_QUERIES.wrap("admin", "del_admin")
     async def del_admin(self, data: AdminData) -> bool:
         async with self.__session_factory() as session:
             try:
@@ -49,6 +54,7 @@ class AdminService(AbstractService):
                 await session.commit()
                 return True
             except SQLAlchemyError as e:
+                DB_QUERIES.errors.inc(service="admin", query="del_admin")
                 await session.rollback()
                 logging.error("Database error occurred while deleting admin: %s", e)
                 return False
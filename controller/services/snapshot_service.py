@@ -0,0 +1,112 @@
+from datetime import date, datetime
+import logging
+from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncSession
+from sqlalchemy import Text, case, cast, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import SQLAlchemyError
+
+from services.abstract_service import AbstractService, DB_QUERIES
+from models.db_models.snapshot import Snapshot
+
+
+class SnapshotService(AbstractService):
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession]) -> None:
+        self.__session_factory: async_sessionmaker[AsyncSession] = session_factory
+
+    @DB_QUERIES.wrap("snapshot", "save_snapshot")
+    async def save_snapshot(
+        self, user_id: int, dataset: str, day: date, payload: dict, content_hash: str, fetched_at: datetime
+    ) -> bool:
+        """Сохраняет снимок: содержимое перезаписывается, только если изменился хэш,
+        время получения обновляется всегда.
+
+        :return: True, если снимок сохранён, False при ошибке
+        """
+        statement = insert(Snapshot).values(
+            user_id=user_id,
+            dataset=dataset,
+            day=day,
+            payload=payload,
+            content_hash=content_hash,
+            fetched_at=fetched_at,
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[Snapshot.user_id, Snapshot.dataset, Snapshot.day],
+            set_={
+                "payload": case(
+                    (Snapshot.content_hash != statement.excluded.content_hash, statement.excluded.payload),
+                    else_=Snapshot.payload,
+                ),
+                "content_hash": statement.excluded.content_hash,
+                "fetched_at": statement.excluded.fetched_at,
+            },
+        )
+
+        async with self.__session_factory() as session:
+            try:
+                await session.execute(statement)
+                await session.commit()
+                return True
+            except SQLAlchemyError as e:
+                DB_QUERIES.errors.inc(service="snapshot", query="save_snapshot")
+                await session.rollback()
+                logging.error("Database error occurred while saving snapshot: %s", e)
+                return False
+
+    @DB_QUERIES.wrap("snapshot", "touch_snapshot")
+    async def touch_snapshot(self, user_id: int, dataset: str, day: date, fetched_at: datetime) -> bool:
+        """Обновляет только время получения снимка, содержимое которого не изменилось.
+
+        :return: True, если снимок найден и обновлён, False, если его нет или произошла ошибка
+        """
+        statement = (
+            update(Snapshot)
+            .where(Snapshot.user_id == user_id, Snapshot.dataset == dataset, Snapshot.day == day)
+            .values(fetched_at=fetched_at)
+        )
+        async with self.__session_factory() as session:
+            try:
+                result = await session.execute(statement)
+                await session.commit()
+                return bool(result.rowcount)
+            except SQLAlchemyError as e:
+                DB_QUERIES.errors.inc(service="snapshot", query="touch_snapshot")
+                await session.rollback()
+                logging.error("Database error occurred while touching snapshot: %s", e)
+                return False
+
+    @DB_QUERIES.wrap("snapshot", "get_latest_snapshot")
+    async def get_latest_snapshot(self, user_id: int, dataset: str) -> Snapshot | None:
+        """Последний сохранённый снимок набора данных пользователя за любой день."""
+        async with self.__session_factory() as session:
+            try:
+                result = await session.execute(
+                    select(Snapshot)
+                    .where(Snapshot.user_id == user_id, Snapshot.dataset == dataset)
+                    .order_by(Snapshot.day.desc())
+                    .limit(1)
+                )
+                return result.scalar_one_or_none()
+            except SQLAlchemyError as e:
+                DB_QUERIES.errors.inc(service="snapshot", query="get_latest_snapshot")
+                logging.error("Database error occurred while fetching latest snapshot: %s", e)
+                return None
+
+    @DB_QUERIES.wrap("snapshot", "get_snapshot_content")
+    async def get_snapshot_content(self, user_id: int, dataset: str, day: date) -> tuple[bytes, str, datetime] | None:
+        """JSON снимка, хэш и время получения; JSONB приводится к тексту в Postgres, без разбора в Python."""
+        async with self.__session_factory() as session:
+            try:
+                result = await session.execute(
+                    select(cast(Snapshot.payload, Text), Snapshot.content_hash, Snapshot.fetched_at).where(
+                        Snapshot.user_id == user_id, Snapshot.dataset == dataset, Snapshot.day == day
+                    )
+                )
+                row = result.one_or_none()
+                if row is None:
+                    return None
+                return row[0].encode(), row[1], row[2]
+            except SQLAlchemyError as e:
+                DB_QUERIES.errors.inc(service="snapshot", query="get_snapshot_content")
+                logging.error("Database error occurred while fetching snapshot: %s", e)
+                return None
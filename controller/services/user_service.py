@@ -1,18 +1,22 @@
 from typing import Tuple
 import logging
 from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncSession
-from sqlalchemy import Result, select
+from sqlalchemy import Result, literal_column, select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.exc import SQLAlchemyError
 
-from services.abstract_service import AbstractService
+from services.abstract_service import AbstractService, DB_QUERIES
 from models.api_models.user_data import UserData
 from models.db_models.user import User
+from src.cookie_cache import UserCookieCache
 
 
 class UserService(AbstractService):
-    def __init__(self, session_factory: async_sessionmaker[AsyncSession]) -> None:
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession], cookie_cache: UserCookieCache) -> None:
         self.__session_factory: async_sessionmaker[AsyncSession] = session_factory
+        self.__cookie_cache: UserCookieCache = cookie_cache
 
+    @DB_QUERIES.wrap("user", "new_user")
     async def new_user(self, data: UserData) -> bool:
         async with self.__session_factory() as session:
             try:
@@ -22,13 +26,16 @@ class UserService(AbstractService):
                     new_user = User(id=data.id, cookies=data.cookies)
                     session.add(new_user)
                     await session.commit()
+                    self.__cookie_cache.invalidate(data.id)
                     return True
                 return False
             except SQLAlchemyError as e:
+                DB_QUERIES.errors.inc(service="user", query="new_user")
                 await session.rollback()
                 logging.error("Database error occurred while adding user: %s", e)
                 return False
 
+    @DB_QUERIES.wrap("user", "change_user_cookies")
     async def change_user_cookies(self, data: UserData) -> bool:
         if data.cookies is None:
             logging.error("A database error occurred while modifying user cookies. Cookies were not received.")
@@ -43,24 +50,62 @@ class UserService(AbstractService):
                 user.cookies = data.cookies
                 await session.commit()
                 await session.refresh(user)
+                self.__cookie_cache.invalidate(data.id)
                 return True
             except SQLAlchemyError as e:
+                DB_QUERIES.errors.inc(service="user", query="change_user_cookies")
                 await session.rollback()
                 logging.error("Database error occurred while change user cookies: %s", e)
                 return False
 
-    async def get_user_cookies(self, data: UserData) -> dict | None:
+    @DB_QUERIES.wrap("user", "upsert_user_cookies")
+    async def upsert_user_cookies(self, data: UserData) -> bool | None:
+        """Создаёт пользователя или обновляет его куки одним запросом.
+
+        :return: True, если пользователь создан, False, если обновлён, None при ошибке
+        """
+        if data.cookies is None:
+            logging.error("A database error occurred while upserting user cookies. Cookies were not received.")
+            return None
+
+        statement = insert(User).values(id=data.id, cookies=data.cookies)
+        statement = statement.on_conflict_do_update(
+            index_elements=[User.id], set_={"cookies": statement.excluded.cookies}
+        ).returning(literal_column("xmax = 0").label("created"))
+
         async with self.__session_factory() as session:
             try:
-                result: Result[Tuple[User]] = await session.execute(select(User).where(User.id == data.id))
-                user: User | None = result.scalar_one_or_none()
-                if user is None:
-                    return 
-                return user.cookies
+                result: Result = await session.execute(statement)
+                created: bool = bool(result.scalar_one())
+                await session.commit()
+                self.__cookie_cache.invalidate(data.id)
+                return created
             except SQLAlchemyError as e:
+                DB_QUERIES.errors.inc(service="user", query="upsert_user_cookies")
                 await session.rollback()
-                logging.error("Database error occurred while change user cookies: %s", e)
+                logging.error("Database error occurred while upserting user cookies: %s", e)
+                return None
+
+    async def get_user_cookies(self, data: UserData) -> dict | None:
+        cached, cookies = self.__cookie_cache.get(data.id)
+        if cached:
+            return cookies
+
+        generation: int = self.__cookie_cache.get_generation()
+        with DB_QUERIES.track(service="user", query="get_user_cookies"):
+            async with self.__session_factory() as session:
+                try:
+                    result: Result[Tuple[User]] = await session.execute(select(User).where(User.id == data.id))
+                    user: User | None = result.scalar_one_or_none()
+                    cookies = None if user is None else user.cookies
+                    self.__cookie_cache.set(data.id, cookies, generation)
+                    return cookies
+                except SQLAlchemyError as e:
+                    DB_QUERIES.errors.inc(service="user", query="get_user_cookies")
+                    await session.rollback()
+                    logging.error("Database error occurred while change user cookies: %s", e)
 
+    @DB_QUERIES.wrap("user", "user_exist")
     async def user_exist(self, data: UserData) -> bool:
         async with self.__session_factory() as session:
             try:
@@ -70,5 +115,6 @@ class UserService(AbstractService):
                     return False
                 return True
             except SQLAlchemyError as e:
+                DB_QUERIES.errors.inc(service="user", query="user_exist")
                 logging.error("Database error occurred while change user cookies: %s", e)
                 return False
\ No newline at end of file
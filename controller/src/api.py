@@ -1,41 +1,103 @@
 import logging
 import abc
-from json import decoder
 from typing import Any
 import httpx
+import orjson
 from pydantic import BaseModel
 
 from models.api_models.user_data import UserData
+from models.api_models.bundle_data import BundleData
+from src.circuit_breaker import CircuitBreaker
+from utils.metrics import Instrument
+from utils.tracing import TRACEPARENT_HEADER, get_traceparent, span
+
+INTERNAL_REQUESTS: Instrument = Instrument("internal_request", "Запросы к сервису дневника", ("path",))
 
 
 class AbstractApi(abc.ABC):
     @abc.abstractmethod
-    def __init__(self, controller_ip: str, timeout: float) -> None:
+    def __init__(
+        self, controller_ip: str, timeout: float, client: httpx.AsyncClient, breaker: CircuitBreaker
+    ) -> None:
         pass
 
 
 class BaseApi(AbstractApi):
-    def __init__(self, api_ip: str, timeout: float) -> None:
+    # Ответы, означающие недоступность сервиса, остальные коды говорят о том, что сервис отвечает
+    FAILURE_STATUSES: frozenset[int] = frozenset({502, 503, 504})
+
+    def __init__(
+        self,
+        api_ip: str,
+        timeout: float,
+        client: httpx.AsyncClient,
+        breaker: CircuitBreaker,
+        path_timeouts: dict[str, float] | None = None,
+    ) -> None:
         self.__api_ip: str = api_ip.rstrip("/")
         self.__timeout: float = timeout
+        self.__client: httpx.AsyncClient = client
+        self.__breaker: CircuitBreaker = breaker
+        self.__path_timeouts: dict[str, float] = path_timeouts or {}
 
-    async def _get_data(self, path: str, data: BaseModel | None = None) -> Any | None:
+    async def __request(self, path: str, data: BaseModel | None) -> httpx.Response | None:
+        if not self.__breaker.allow_request():
+            logging.warning("Запрос к %s отклонён: сервис недоступен", path)
+            return None
+
+        try:
+            return await self.__send(path, data)
+        finally:
+            # Отменённый пробный запрос не должен навсегда оставить размыкатель полуоткрытым
+            self.__breaker.release_probe()
+
+    async def __send(self, path: str, data: BaseModel | None) -> httpx.Response | None:
+        timeout: float = self.__path_timeouts.get(path, self.__timeout)
         try:
-            async with httpx.AsyncClient() as client:
+            with INTERNAL_REQUESTS.track(path=path):
+                traceparent: str | None = get_traceparent()
+                headers: dict[str, str] = {TRACEPARENT_HEADER: traceparent} if traceparent else {}
                 if data:
-                    response: httpx.Response = await client.post(
-                        f"{self.__api_ip}/{path}", json=data.model_dump(), timeout=self.__timeout
+                    headers["Content-Type"] = "application/json"
+                    response: httpx.Response = await self.__client.post(
+                        f"{self.__api_ip}/{path}", content=data.model_dump_json(), timeout=timeout, headers=headers
                     )
                 else:
-                    response: httpx.Response = await client.get(f"{self.__api_ip}/{path}", timeout=self.__timeout)
-            response.raise_for_status()
-        except (httpx.HTTPStatusError, httpx.ConnectTimeout, httpx.ReadTimeout, httpx.RequestError) as exc:
+                    response: httpx.Response = await self.__client.get(
+                        f"{self.__api_ip}/{path}", timeout=timeout, headers=headers
+                    )
+                response.raise_for_status()
+        except httpx.HTTPStatusError as exc:
+            # Ошибки 4xx и 500 из-за данных одного пользователя не должны размыкать цепь для всех
+            if exc.response.status_code in self.FAILURE_STATUSES:
+                self.__breaker.record_failure()
+            else:
+                self.__breaker.record_success()
+            logging.warning("Ошибка запроса к %s: %s", path, exc)
+            return None
+        except (httpx.ConnectTimeout, httpx.ReadTimeout, httpx.RequestError) as exc:
+            self.__breaker.record_failure()
             logging.warning("Ошибка запроса к %s: %s", path, exc)
             return None
+        self.__breaker.record_success()
+        return response
+
+    async def _get_data(self, path: str, data: BaseModel | None = None) -> Any | None:
+        response: httpx.Response | None = await self.__request(path, data)
+        if response is None:
+            return None
         try:
-            return response.json()
-        except decoder.JSONDecodeError:
+            with span("json_decode"):
+                return orjson.loads(response.content)
+        except orjson.JSONDecodeError:
+            return None
+
+    async def _get_raw(self, path: str, data: BaseModel | None = None) -> bytes | None:
+        """Тело ответа без разбора, для передачи JSON дальше как есть."""
+        response: httpx.Response | None = await self.__request(path, data)
+        if response is None:
             return None
+        return response.content
 
 
 class DnevnikApi(BaseApi):
@@ -47,35 +109,40 @@ class DnevnikApi(BaseApi):
         "get_school_info": "dnevnik/get_school_info",
         "get_homework_from_range": "dnevnik/get_homework_from_range",
         "get_missed_lessons": "dnevnik/get_missed_lessons",
+        "bundle": "dnevnik/bundle",
     }
 
-    async def get_person_data(self, data: UserData) -> dict | None:
+    async def get_person_data(self, data: UserData) -> bytes | None:
         path: str = self.PATHS["get_person_data"]
-        return await self._get_data(path, data)
+        return await self._get_raw(path, data)
 
-    async def get_summary_marks(self, data: UserData) -> dict | None:
+    async def get_summary_marks(self, data: UserData) -> bytes | None:
         path: str = self.PATHS["get_summary_marks"]
-        return await self._get_data(path, data)
+        return await self._get_raw(path, data)
 
-    async def get_diary(self, data: UserData) -> dict | None:
+    async def get_diary(self, data: UserData) -> bytes | None:
         path: str = self.PATHS["get_diary"]
-        return await self._get_data(path, data)
+        return await self._get_raw(path, data)
 
-    async def get_week_schedule(self, data: UserData) -> dict | None:
+    async def get_week_schedule(self, data: UserData) -> bytes | None:
         path: str = self.PATHS["get_week_schedule"]
-        return await self._get_data(path, data)
+        return await self._get_raw(path, data)
 
-    async def get_school_info(self, data: UserData) -> dict | None:
+    async def get_school_info(self, data: UserData) -> bytes | None:
         path: str = self.PATHS["get_school_info"]
-        return await self._get_data(path, data)
+        return await self._get_raw(path, data)
 
-    async def get_homework_from_range(self, data: UserData) -> dict | None:
+    async def get_homework_from_range(self, data: UserData) -> bytes | None:
         path: str = self.PATHS["get_homework_from_range"]
-        return await self._get_data(path, data)
+        return await self._get_raw(path, data)
 
-    async def get_missed_lessons(self, data: UserData) -> dict | None:
+    async def get_missed_lessons(self, data: UserData) -> bytes | None:
         path: str = self.PATHS["get_missed_lessons"]
-        return await self._get_data(path, data)
+        return await self._get_raw(path, data)
+
+    async def get_bundle(self, data: BundleData) -> bytes | None:
+        path: str = self.PATHS["bundle"]
+        return await self._get_raw(path, data)
 
 
 class LoginApi(BaseApi):
@@ -0,0 +1,83 @@
+import logging
+import time
+from enum import Enum
+
+
+class CircuitState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Размыкатель цепи для запросов к внутреннему сервису.
+
+    После ``failure_threshold`` ошибок подряд запросы отклоняются сразу на ``recovery_timeout`` секунд,
+    затем пропускается один пробный запрос.
+    """
+
+    DEFAULT_FAILURE_THRESHOLD: int = 5
+    DEFAULT_RECOVERY_TIMEOUT: float = 30.0
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        recovery_timeout: float = DEFAULT_RECOVERY_TIMEOUT,
+    ) -> None:
+        self.__name: str = name
+        self.__failure_threshold: int = failure_threshold
+        self.__recovery_timeout: float = recovery_timeout
+        self.__state: CircuitState = CircuitState.CLOSED
+        self.__failures: int = 0
+        self.__opened_at: float = 0.0
+        self.__probe_in_flight: bool = False
+        self.__rejected: int = 0
+
+    @property
+    def name(self) -> str:
+        return self.__name
+
+    def get_state(self) -> CircuitState:
+        if self.__state is CircuitState.OPEN and time.monotonic() - self.__opened_at >= self.__recovery_timeout:
+            self.__state = CircuitState.HALF_OPEN
+            self.__probe_in_flight = False
+        return self.__state
+
+    def allow_request(self) -> bool:
+        state: CircuitState = self.get_state()
+        if state is CircuitState.CLOSED:
+            return True
+        if state is CircuitState.HALF_OPEN and not self.__probe_in_flight:
+            self.__probe_in_flight = True
+            return True
+        self.__rejected += 1
+        return False
+
+    def record_success(self) -> None:
+        if self.__state is not CircuitState.CLOSED:
+            logging.info("Сервис %s снова доступен", self.__name)
+        self.__state = CircuitState.CLOSED
+        self.__failures = 0
+        self.__probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self.__failures += 1
+        if self.__state is CircuitState.HALF_OPEN or self.__failures >= self.__failure_threshold:
+            if self.__state is not CircuitState.OPEN:
+                logging.warning("Сервис %s недоступен, запросы отклоняются %s с", self.__name, self.__recovery_timeout)
+            self.__state = CircuitState.OPEN
+            self.__opened_at = time.monotonic()
+            self.__probe_in_flight = False
+
+    def release_probe(self) -> None:
+        """Освобождает место пробного запроса, если он завершился без результата (например, был отменён)."""
+        if self.__state is CircuitState.HALF_OPEN:
+            self.__probe_in_flight = False
+
+    def get_stats(self) -> dict:
+        return {
+            "state": self.get_state().value,
+            "failures": self.__failures,
+            "rejected": self.__rejected,
+        }
@@ -0,0 +1,82 @@
+import time
+from collections import OrderedDict
+
+
+class UserCookieCache:
+    """LRU кэш кук пользователей перед запросами к базе.
+
+    Отсутствующие пользователи кэшируются на короткий ``negative_ttl``, чтобы повторные
+    запросы незарегистрированных пользователей не доходили до базы.
+    Чтение из базы, начатое до изменения кук, не должно вернуть старые куки в кэш:
+    перед запросом берётся номер поколения (:meth:`get_generation`), и :meth:`set` с устаревшим
+    номером ничего не сохраняет.
+    """
+
+    DEFAULT_MAX_SIZE: int = 10000
+    DEFAULT_TTL: float = 600.0
+    DEFAULT_NEGATIVE_TTL: float = 30.0
+
+    def __init__(
+        self,
+        max_size: int = DEFAULT_MAX_SIZE,
+        ttl: float = DEFAULT_TTL,
+        negative_ttl: float = DEFAULT_NEGATIVE_TTL,
+    ) -> None:
+        self.__max_size: int = max_size
+        self.__ttl: float = ttl
+        self.__negative_ttl: float = negative_ttl
+        self.__entries: OrderedDict[int, tuple[float, dict | None]] = OrderedDict()
+        # Увеличивается при каждой инвалидации
+        self.__generation: int = 0
+        self.__stale_sets: int = 0
+        self.__hits: int = 0
+        self.__negative_hits: int = 0
+        self.__misses: int = 0
+
+    def get(self, user_id: int) -> tuple[bool, dict | None]:
+        entry: tuple[float, dict | None] | None = self.__entries.get(user_id)
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                del self.__entries[user_id]
+            self.__misses += 1
+            return False, None
+
+        self.__entries.move_to_end(user_id)
+        cookies: dict | None = entry[1]
+        if cookies is None:
+            self.__negative_hits += 1
+        else:
+            self.__hits += 1
+        return True, cookies
+
+    def get_generation(self) -> int:
+        return self.__generation
+
+    def set(self, user_id: int, cookies: dict | None, generation: int | None = None) -> None:
+        """Кэширует куки; ``generation``, взятый до чтения из базы, отбрасывает устаревший результат."""
+        if generation is not None and generation != self.__generation:
+            self.__stale_sets += 1
+            return
+        ttl: float = self.__ttl if cookies else self.__negative_ttl
+        self.__entries[user_id] = (time.monotonic() + ttl, cookies or None)
+        self.__entries.move_to_end(user_id)
+        while len(self.__entries) > self.__max_size:
+            self.__entries.popitem(last=False)
+
+    def invalidate(self, user_id: int) -> None:
+        self.__generation += 1
+        self.__entries.pop(user_id, None)
+
+    def get_stats(self) -> dict:
+        lookups: int = self.__hits + self.__negative_hits + self.__misses
+        avoided: int = self.__hits + self.__negative_hits
+        return {
+            "entries": len(self.__entries),
+            "max_size": self.__max_size,
+            "hits": self.__hits,
+            "negative_hits": self.__negative_hits,
+            "misses": self.__misses,
+            "hit_rate": avoided / lookups if lookups else 0.0,
+            "db_queries_avoided": avoided,
+            "stale_sets": self.__stale_sets,
+        }
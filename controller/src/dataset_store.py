@@ -0,0 +1,137 @@
+import hashlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+
+import orjson
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from services.snapshot_service import SnapshotService
+from src.mark_events import MarkNotifier
+
+
+@dataclass
+class StoredDataset:
+    # JSON набора данных в том виде, в каком он отдаётся боту
+    content: bytes
+    content_hash: str
+    fetched_at: datetime
+    # Время получения, записанное в снимке в базе
+    persisted_at: datetime | None = None
+
+    def get_age(self) -> float:
+        return (datetime.now(timezone.utc) - self.fetched_at).total_seconds()
+
+
+class DatasetStore:
+    """Последние полученные наборы данных дневника: LRU в памяти поверх снимков в Postgres.
+
+    Запись считается свежей, пока не истёк ``max_age`` и не сменился день.
+    Хэш считается по байтам ответа, которые сервис дневника передаёт без изменений,
+    поэтому неизменный ответ не разбирается: JSON декодируется, снимок перезаписывается
+    и новые оценки ищутся только при изменении хэша. При неизменном хэше запись в базу пропускается,
+    только время получения в снимке обновляется не чаще раза в ``touch_interval`` секунд,
+    чтобы после перезапуска снимок не считался устаревшим.
+    """
+
+    DEFAULT_MAX_ENTRIES: int = 30000
+    DEFAULT_MAX_AGE: float = 900.0
+    DEFAULT_TOUCH_INTERVAL: float = 600.0
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker,
+        notifier: MarkNotifier | None = None,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_age: float = DEFAULT_MAX_AGE,
+        touch_interval: float = DEFAULT_TOUCH_INTERVAL,
+    ) -> None:
+        self.__snapshot_service: SnapshotService = SnapshotService(session_factory)
+        self.__notifier: MarkNotifier | None = notifier
+        self.__max_entries: int = max_entries
+        self.__max_age: float = max_age
+        self.__touch_interval: float = touch_interval
+        self.__entries: OrderedDict[tuple[int, str, date], StoredDataset] = OrderedDict()
+        self.__hits: int = 0
+        self.__db_hits: int = 0
+        self.__misses: int = 0
+        self.__writes: int = 0
+        self.__skipped_writes: int = 0
+        self.__touches: int = 0
+
+    @staticmethod
+    def __hash(content: bytes) -> str:
+        return hashlib.sha256(content).hexdigest()
+
+    def __remember(self, key: tuple[int, str, date], stored: StoredDataset) -> None:
+        self.__entries[key] = stored
+        self.__entries.move_to_end(key)
+        while len(self.__entries) > self.__max_entries:
+            self.__entries.popitem(last=False)
+
+    async def get(self, user_id: int, dataset: str) -> StoredDataset | None:
+        key: tuple[int, str, date] = (user_id, dataset, date.today())
+        stored: StoredDataset | None = self.__entries.get(key)
+        if stored is not None and stored.get_age() < self.__max_age:
+            self.__entries.move_to_end(key)
+            self.__hits += 1
+            return stored
+
+        if stored is None:
+            snapshot: tuple[bytes, str, datetime] | None = await self.__snapshot_service.get_snapshot_content(*key)
+            if snapshot is not None:
+                content, content_hash, fetched_at = snapshot
+                stored = StoredDataset(content, content_hash, fetched_at, fetched_at)
+                self.__remember(key, stored)
+                if stored.get_age() < self.__max_age:
+                    self.__db_hits += 1
+                    return stored
+
+        self.__misses += 1
+        return None
+
+    def __is_persisted_stale(self, stored: StoredDataset) -> bool:
+        if stored.persisted_at is None:
+            return True
+        return (datetime.now(timezone.utc) - stored.persisted_at).total_seconds() >= self.__touch_interval
+
+    async def set(self, user_id: int, dataset: str, content: bytes) -> StoredDataset:
+        key: tuple[int, str, date] = (user_id, dataset, date.today())
+        stored: StoredDataset = StoredDataset(content, self.__hash(content), datetime.now(timezone.utc))
+
+        previous: StoredDataset | None = self.__entries.get(key)
+        if previous is not None and previous.content_hash == stored.content_hash:
+            stored.persisted_at = previous.persisted_at
+            if not self.__is_persisted_stale(previous):
+                self.__skipped_writes += 1
+                self.__remember(key, stored)
+                return stored
+            if await self.__snapshot_service.touch_snapshot(user_id, dataset, key[2], stored.fetched_at):
+                self.__touches += 1
+                stored.persisted_at = stored.fetched_at
+                self.__remember(key, stored)
+                return stored
+            # Снимка в базе нет, он сохраняется полностью
+
+        payload: dict = orjson.loads(content)
+        if self.__notifier is not None:
+            await self.__notifier.observe(user_id, dataset, payload)
+        if await self.__snapshot_service.save_snapshot(
+            user_id, dataset, key[2], payload, stored.content_hash, stored.fetched_at
+        ):
+            self.__writes += 1
+            stored.persisted_at = stored.fetched_at
+
+        self.__remember(key, stored)
+        return stored
+
+    def get_stats(self) -> dict:
+        return {
+            "entries": len(self.__entries),
+            "hits": self.__hits,
+            "db_hits": self.__db_hits,
+            "misses": self.__misses,
+            "writes": self.__writes,
+            "skipped_writes": self.__skipped_writes,
+            "touches": self.__touches,
+        }
@@ -0,0 +1,154 @@
+import asyncio
+from collections import Counter, OrderedDict, deque
+from contextlib import suppress
+from typing import Any
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from models.db_models.snapshot import Snapshot
+from services.snapshot_service import SnapshotService
+
+Mark = tuple[str, str, str]
+
+
+class MarkNotifier:
+    """Поиск новых оценок в наборах данных дневника и очередь событий для бота.
+
+    Для каждого пользователя хранится последний набор оценок по каждому набору данных.
+    Новый ответ сравнивается с ним, и добавленные или изменённые оценки становятся событием.
+    Оценки считаются с учётом повторов, поэтому вторая такая же оценка по предмету за день тоже попадает в событие.
+    Если набора в памяти нет (после перезапуска или вытеснения), сравнение идёт с последним снимком из базы;
+    ответ запоминается без события, только если снимка тоже нет, чтобы не присылать всю историю оценок.
+    Одна и та же оценка из сводки и из дневника отправляется один раз.
+    """
+
+    DATASETS: tuple[str, ...] = ("get_summary_marks", "get_diary")
+    DEFAULT_MAX_USERS: int = 30000
+    DEFAULT_MAX_EVENTS: int = 10000
+    # Сколько последних отправленных оценок помнить на пользователя для удаления дублей
+    MAX_ANNOUNCED_PER_USER: int = 500
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker,
+        max_users: int = DEFAULT_MAX_USERS,
+        max_events: int = DEFAULT_MAX_EVENTS,
+    ) -> None:
+        self.__snapshot_service: SnapshotService = SnapshotService(session_factory)
+        self.__max_users: int = max_users
+        self.__baselines: OrderedDict[tuple[int, str], Counter[Mark]] = OrderedDict()
+        # Сколько раз каждая оценка уже была отправлена или учтена в исходном наборе
+        self.__announced: OrderedDict[int, OrderedDict[Mark, int]] = OrderedDict()
+        self.__events: deque[dict] = deque(maxlen=max_events)
+        self.__seq: int = 0
+        self.__new_events: asyncio.Condition = asyncio.Condition()
+        self.__diffs: int = 0
+        self.__published: int = 0
+
+    @classmethod
+    def __extract(cls, node: Any, discipline: str = "", marks: Counter[Mark] | None = None) -> Counter[Mark]:
+        """Собирает оценки из списков ``marks`` в любом месте ответа вместе с ближайшим названием предмета."""
+        if marks is None:
+            marks = Counter()
+        if isinstance(node, dict):
+            discipline = str(node.get("discipline") or discipline)
+            for key, value in node.items():
+                if key == "marks" and isinstance(value, list):
+                    for mark in value:
+                        marks[cls.__normalize(discipline, mark)] += 1
+                else:
+                    cls.__extract(value, discipline, marks)
+        elif isinstance(node, list):
+            for item in node:
+                cls.__extract(item, discipline, marks)
+        return marks
+
+    @staticmethod
+    def __normalize(discipline: str, mark: Any) -> Mark:
+        if isinstance(mark, dict):
+            value: Any = mark.get("mark", mark.get("value", ""))
+            return discipline, str(value), str(mark.get("date", ""))
+        return discipline, str(mark), ""
+
+    def __remember_announced(self, user_id: int, current: Counter[Mark], added: Counter[Mark]) -> list[Mark]:
+        """Возвращает оценки из ``added``, которых ещё не было в событиях, с учётом их числа в ``current``."""
+        announced: OrderedDict[Mark, int] = self.__announced.setdefault(user_id, OrderedDict())
+        self.__announced.move_to_end(user_id)
+        while len(self.__announced) > self.__max_users:
+            self.__announced.popitem(last=False)
+        fresh: list[Mark] = []
+        for mark, count in current.items():
+            known: int = announced.get(mark, 0)
+            if added[mark]:
+                fresh.extend([mark] * min(added[mark], count - known))
+            if count > known:
+                announced[mark] = count
+                announced.move_to_end(mark)
+        while len(announced) > self.MAX_ANNOUNCED_PER_USER:
+            announced.popitem(last=False)
+        return fresh
+
+    async def __load_baseline(self, user_id: int, dataset: str) -> Counter[Mark] | None:
+        snapshot: Snapshot | None = await self.__snapshot_service.get_latest_snapshot(user_id, dataset)
+        if snapshot is None:
+            return None
+        return self.__extract(snapshot.payload)
+
+    async def observe(self, user_id: int, dataset: str, payload: dict) -> None:
+        """Сравнивает новый ответ с предыдущим и публикует событие о новых оценках."""
+        if dataset not in self.DATASETS:
+            return
+        key: tuple[int, str] = (user_id, dataset)
+        current: Counter[Mark] = self.__extract(payload)
+        previous: Counter[Mark] | None = self.__baselines.get(key)
+        if previous is None:
+            # Снимок в базе ещё предыдущий: текущий ответ сохраняется после сравнения
+            previous = await self.__load_baseline(user_id, dataset)
+        self.__baselines[key] = current
+        self.__baselines.move_to_end(key)
+        while len(self.__baselines) > self.__max_users * len(self.DATASETS):
+            self.__baselines.popitem(last=False)
+        if previous is None:
+            self.__remember_announced(user_id, current, Counter())
+            return
+
+        self.__diffs += 1
+        added: list[Mark] = self.__remember_announced(user_id, current, current - previous)
+        if not added:
+            return
+
+        async with self.__new_events:
+            self.__seq += 1
+            self.__events.append(
+                {
+                    "seq": self.__seq,
+                    "user_id": user_id,
+                    "marks": [{"discipline": discipline, "mark": mark, "date": day} for discipline, mark, day in added],
+                }
+            )
+            self.__published += 1
+            self.__new_events.notify_all()
+
+    async def get_events(self, after: int, timeout: float) -> list[dict]:
+        """События с номером больше ``after``; ждёт появления новых не дольше ``timeout`` секунд."""
+        async with self.__new_events:
+            # Номер больше последнего означает, что контроллер был перезапущен
+            if after > self.__seq:
+                after = 0
+            if self.__seq <= after:
+                with suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(self.__new_events.wait_for(lambda: self.__seq > after), timeout)
+            return [event for event in self.__events if event["seq"] > after]
+
+    def get_last_seq(self) -> int:
+        """Номер последнего события, с него начинает опрос только что запущенный бот."""
+        return self.__seq
+
+    def get_stats(self) -> dict:
+        return {
+            "tracked": len(self.__baselines),
+            "diffs": self.__diffs,
+            "published": self.__published,
+            "queued": len(self.__events),
+            "last_seq": self.__seq,
+        }
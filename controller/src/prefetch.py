@@ -0,0 +1,178 @@
+import asyncio
+import logging
+import random
+import time
+from collections import OrderedDict
+from contextlib import suppress
+from datetime import datetime
+from typing import Awaitable, Callable
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from models.api_models.user_data import UserData
+from services.user_service import UserService
+from src.api import DnevnikApi
+from src.cookie_cache import UserCookieCache
+from src.dataset_store import DatasetStore
+
+
+class ActivityTracker:
+    """Время последнего обращения пользователей к дневнику."""
+
+    DEFAULT_MAX_USERS: int = 30000
+
+    def __init__(self, max_users: int = DEFAULT_MAX_USERS) -> None:
+        self.__max_users: int = max_users
+        self.__last_seen: OrderedDict[int, float] = OrderedDict()
+
+    def touch(self, user_id: int) -> None:
+        self.__last_seen[user_id] = time.time()
+        self.__last_seen.move_to_end(user_id)
+        while len(self.__last_seen) > self.__max_users:
+            self.__last_seen.popitem(last=False)
+
+    def get_active(self, window: float, limit: int) -> list[int]:
+        """Пользователи, активные за последние ``window`` секунд, начиная с самых недавних."""
+        border: float = time.time() - window
+        active: list[int] = []
+        for user_id, last_seen in reversed(self.__last_seen.items()):
+            if last_seen < border or len(active) >= limit:
+                break
+            active.append(user_id)
+        return active
+
+
+class PrefetchScheduler:
+    """Фоновое обновление оценок, дневника и расписания недавно активных пользователей.
+
+    Запускается только в заданные часы, ограничивает параллельность и темп запросов,
+    чтобы занимать не больше ``upstream_share`` от ``upstream_rps`` сервера дневника.
+    По умолчанию работает ночью; нулевая доля или нулевой темп отключают предзагрузку.
+    """
+
+    DATASETS: tuple[str, ...] = ("get_summary_marks", "get_diary", "get_week_schedule")
+    DEFAULT_INTERVAL: float = 600.0
+    # Часы [начало, конец) по локальному времени, окно через полночь задаётся двумя интервалами
+    DEFAULT_WINDOWS: tuple[tuple[int, int], ...] = ((0, 6), (22, 24))
+    DEFAULT_ACTIVE_WINDOW: float = 3 * 24 * 3600.0
+    DEFAULT_MAX_USERS: int = 500
+    DEFAULT_CONCURRENCY: int = 4
+    DEFAULT_JITTER: float = 5.0
+    DEFAULT_UPSTREAM_RPS: float = 20.0
+    DEFAULT_UPSTREAM_SHARE: float = 0.25
+
+    def __init__(
+        self,
+        api: DnevnikApi,
+        session_factory: async_sessionmaker,
+        cookie_cache: UserCookieCache,
+        activity: ActivityTracker,
+        store: DatasetStore,
+        interval: float = DEFAULT_INTERVAL,
+        windows: tuple[tuple[int, int], ...] = DEFAULT_WINDOWS,
+        active_window: float = DEFAULT_ACTIVE_WINDOW,
+        max_users: int = DEFAULT_MAX_USERS,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        jitter: float = DEFAULT_JITTER,
+        upstream_rps: float = DEFAULT_UPSTREAM_RPS,
+        upstream_share: float = DEFAULT_UPSTREAM_SHARE,
+    ) -> None:
+        self.__fetchers: dict[str, Callable[[UserData], Awaitable[bytes | None]]] = {
+            "get_summary_marks": api.get_summary_marks,
+            "get_diary": api.get_diary,
+            "get_week_schedule": api.get_week_schedule,
+        }
+        self.__user_service: UserService = UserService(session_factory, cookie_cache)
+        self.__activity: ActivityTracker = activity
+        self.__store: DatasetStore = store
+        self.__interval: float = interval
+        self.__windows: tuple[tuple[int, int], ...] = windows
+        self.__active_window: float = active_window
+        self.__max_users: int = max_users
+        self.__concurrency: int = concurrency
+        self.__jitter: float = jitter
+        self.__enabled: bool = upstream_rps > 0 and upstream_share > 0
+        # Каждый пользователь стоит len(DATASETS) запросов к серверу дневника
+        self.__request_interval: float = (
+            len(self.DATASETS) / (upstream_rps * upstream_share) if self.__enabled else 0.0
+        )
+
+        self.__task: asyncio.Task | None = None
+        self.__pace_lock: asyncio.Lock = asyncio.Lock()
+        self.__next_request_at: float = 0.0
+
+        self.__runs: int = 0
+        self.__prefetched: int = 0
+        self.__failures: int = 0
+        self.__last_run_duration: float = 0.0
+
+    def __in_window(self, hour: int) -> bool:
+        return any(start <= hour < end for start, end in self.__windows)
+
+    async def __pace(self) -> None:
+        async with self.__pace_lock:
+            delay: float = self.__next_request_at - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self.__next_request_at = time.monotonic() + self.__request_interval
+
+    async def __prefetch_user(self, user_id: int, semaphore: asyncio.Semaphore) -> None:
+        async with semaphore:
+            await asyncio.sleep(random.uniform(0, self.__jitter))
+            cookies: dict | None = await self.__user_service.get_user_cookies(UserData(id=user_id))
+            if not cookies:
+                return
+            await self.__pace()
+            # Отдельные запросы вместо bundle: байты каждого набора сохраняются как есть, без разбора
+            data: UserData = UserData(id=user_id, cookies=cookies)
+            contents: list[bytes | None] = await asyncio.gather(
+                *(self.__fetchers[dataset](data) for dataset in self.DATASETS)
+            )
+        for dataset, content in zip(self.DATASETS, contents):
+            if content is not None:
+                await self.__store.set(user_id, dataset, content)
+            else:
+                self.__failures += 1
+        self.__prefetched += 1
+
+    async def __prefetch_active(self) -> None:
+        started: float = time.monotonic()
+        users: list[int] = self.__activity.get_active(self.__active_window, self.__max_users)
+        semaphore: asyncio.Semaphore = asyncio.Semaphore(self.__concurrency)
+        results = await asyncio.gather(
+            *(self.__prefetch_user(user_id, semaphore) for user_id in users), return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                self.__failures += 1
+                logging.warning("Ошибка предзагрузки данных: %s", result)
+        self.__runs += 1
+        self.__last_run_duration = time.monotonic() - started
+        logging.info("Предзагружены данные %s пользователей за %.1f с", len(users), self.__last_run_duration)
+
+    async def __run(self) -> None:
+        while True:
+            await asyncio.sleep(self.__interval)
+            if self.__in_window(datetime.now().hour):
+                await self.__prefetch_active()
+
+    async def start(self) -> None:
+        if not self.__enabled:
+            logging.info("Предзагрузка данных отключена: доля запросов к серверу дневника равна нулю")
+            return
+        self.__task = asyncio.create_task(self.__run())
+
+    async def close(self) -> None:
+        if self.__task is not None:
+            self.__task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self.__task
+
+    def get_stats(self) -> dict:
+        return {
+            "enabled": self.__enabled,
+            "runs": self.__runs,
+            "prefetched_users": self.__prefetched,
+            "failures": self.__failures,
+            "last_run_duration": self.__last_run_duration,
+        }
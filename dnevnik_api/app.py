@@ -2,33 +2,113 @@
 Основной модуль запуска FastAPI сервера.
 """
 
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from uvicorn import run
 
 from utils.logger import Logger
-from routers import abstract, base, dnevnik, login
+from utils import tracing
+from utils.cookie import AbstractCookieBackend, Cookie, FileCookieBackend, MemoryCookieBackend
+from routers import abstract, base, dnevnik, login, stats
+from routers.metrics import MetricsRouter
+from src.http_client import HttpClient
 from src.parser import AbstractParser, Parser
+from src.response_cache import ResponseCache
+from src.single_flight import SingleFlight
 from src.login_parser import AbstractLoginParser, LoginParser
+from src.http_login_parser import HttpLoginParser
+from src.browser_pool import BrowserPool
+from src.login_sessions import PendingLoginRegistry
+import config
 from config import LOGGING_LEVEL, HOST, PORT, TIMEOUT
 
 
+# Настройки, добавленные после первого выпуска, необязательны: если их нет в config.py, берутся значения по умолчанию
+HTTP_MAX_CONNECTIONS: int = getattr(config, "HTTP_MAX_CONNECTIONS", HttpClient.DEFAULT_MAX_CONNECTIONS)
+HTTP_MAX_KEEPALIVE: int = getattr(config, "HTTP_MAX_KEEPALIVE", HttpClient.DEFAULT_MAX_KEEPALIVE)
+HTTP_KEEPALIVE_EXPIRY: float = getattr(config, "HTTP_KEEPALIVE_EXPIRY", HttpClient.DEFAULT_KEEPALIVE_EXPIRY)
+HTTP2: bool = getattr(config, "HTTP2", False)
+CACHE_MAX_BYTES: int = getattr(config, "CACHE_MAX_BYTES", ResponseCache.DEFAULT_MAX_BYTES)
+BUNDLE_CONCURRENCY: int = getattr(config, "BUNDLE_CONCURRENCY", dnevnik.DnevnikRouter.DEFAULT_BUNDLE_CONCURRENCY)
+BROWSER_POOL_SIZE: int = getattr(config, "BROWSER_POOL_SIZE", BrowserPool.DEFAULT_SIZE)
+BROWSER_MAX_USES: int = getattr(config, "BROWSER_MAX_USES", BrowserPool.DEFAULT_MAX_USES)
+BROWSER_MAX_OVERFLOW: int = getattr(config, "BROWSER_MAX_OVERFLOW", BrowserPool.DEFAULT_MAX_OVERFLOW)
+LOGIN_ENGINE: str = getattr(config, "LOGIN_ENGINE", "selenium")
+PENDING_LOGIN_TTL: float = getattr(config, "PENDING_LOGIN_TTL", PendingLoginRegistry.DEFAULT_TTL)
+MAX_PENDING_LOGINS: int = getattr(config, "MAX_PENDING_LOGINS", PendingLoginRegistry.DEFAULT_MAX_SESSIONS)
+COOKIE_BACKEND: str = getattr(config, "COOKIE_BACKEND", "memory")
+COOKIE_PATH: str = getattr(config, "COOKIE_PATH", "cookies")
+COOKIE_TTL: float = getattr(config, "COOKIE_TTL", 300.0)
+DNEVNIK_URL: str = getattr(config, "DNEVNIK_URL", Parser.DEFAULT_BASE_URL)
+LOG_PATH: str = getattr(config, "LOG_PATH", "app.log")
+LOG_MAX_BYTES: int = getattr(config, "LOG_MAX_BYTES", 10 * 1024 * 1024)
+LOG_BACKUP_COUNT: int = getattr(config, "LOG_BACKUP_COUNT", 5)
+LOG_ROTATE_WHEN: str | None = getattr(config, "LOG_ROTATE_WHEN", None)
+LOG_JSON: bool = getattr(config, "LOG_JSON", False)
+LOG_SAMPLE_INTERVAL: float = getattr(config, "LOG_SAMPLE_INTERVAL", 0.0)
+TRACE_PATH: str | None = getattr(config, "TRACE_PATH", None)
+
+
 def main() -> None:
     """Основная функция инициализации и запуска сервера.
 
     Выполняет:
     1. Настройку системы логирования
-    2. Создание FastAPI приложения
-    3. Добавление CORS middleware
-    4. Инициализацию парсера данных
-    5. Подключение роутеров
-    6. Запуск сервера через Uvicorn
+    2. Создание общего HTTP клиента и пула браузеров, закрываемых при остановке приложения
+    3. Создание FastAPI приложения
+    4. Добавление CORS middleware
+    5. Инициализацию парсера данных и выбранного движка входа (LOGIN_ENGINE: "http" или "selenium")
+    6. Подключение роутеров и middleware метрик
+    7. Запуск сервера через Uvicorn
 
     :raises Exception: При ошибках инициализации компонентов
     """
-    Logger(LOGGING_LEVEL)
+    Logger(
+        LOGGING_LEVEL,
+        path=LOG_PATH,
+        max_bytes=LOG_MAX_BYTES,
+        backup_count=LOG_BACKUP_COUNT,
+        when=LOG_ROTATE_WHEN,
+        json_format=LOG_JSON,
+        sample_interval=LOG_SAMPLE_INTERVAL,
+    )
+    tracing.configure("dnevnik_api", TRACE_PATH)
+
+    http_client: HttpClient = HttpClient(
+        TIMEOUT,
+        max_connections=HTTP_MAX_CONNECTIONS,
+        max_keepalive=HTTP_MAX_KEEPALIVE,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        http2=HTTP2,
+    )
+
+    browser_pool: BrowserPool = BrowserPool(
+        size=BROWSER_POOL_SIZE, max_uses=BROWSER_MAX_USES, max_overflow=BROWSER_MAX_OVERFLOW
+    )
+    login_sessions: PendingLoginRegistry = PendingLoginRegistry(PENDING_LOGIN_TTL, MAX_PENDING_LOGINS)
+    cookie_backend: AbstractCookieBackend = (
+        FileCookieBackend(Path(COOKIE_PATH)) if COOKIE_BACKEND == "file" else MemoryCookieBackend()
+    )
+    cookie: Cookie = Cookie(cookie_backend, COOKIE_TTL)
+
+    @asynccontextmanager
+    async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+        # Для HTTP движка браузеры нужны только при переходе на Selenium, они запускаются по требованию
+        await browser_pool.start(prewarm=LOGIN_ENGINE != "http")
+        await login_sessions.start()
+        await cookie.start()
+        yield
+        await cookie.close()
+        await login_sessions.close()
+        await browser_pool.close()
+        await http_client.close()
+        tracing.close()
 
-    app: FastAPI = FastAPI()
+    app: FastAPI = FastAPI(lifespan=lifespan)
 
     app.add_middleware(
         CORSMiddleware,
@@ -38,16 +118,24 @@ def main() -> None:
         allow_headers=["*"],
     )
 
-    parser: AbstractParser = Parser(TIMEOUT)
-    login_parser: AbstractLoginParser = LoginParser(TIMEOUT)
+    response_cache: ResponseCache = ResponseCache(CACHE_MAX_BYTES)
+    single_flight: SingleFlight = SingleFlight()
+    parser: AbstractParser = Parser(http_client, response_cache, single_flight, DNEVNIK_URL)
+    login_parser: AbstractLoginParser = LoginParser(browser_pool, login_sessions, cookie, TIMEOUT)
+    if LOGIN_ENGINE == "http":
+        login_parser = HttpLoginParser(login_sessions, cookie, login_parser, TIMEOUT)
 
     routers: tuple[abstract.AbstractRouter, ...] = (
         base.Router(),
-        dnevnik.DnevnikRouter(parser),
+        dnevnik.DnevnikRouter(parser, bundle_concurrency=BUNDLE_CONCURRENCY),
         login.LoginRouter(login_parser),
+        stats.StatsRouter(http_client, response_cache, single_flight, browser_pool, login_sessions, cookie),
     )
-    for router in routers:
+    metrics: MetricsRouter = MetricsRouter()
+    for router in (*routers, metrics):
         app.include_router(router.get_router())
+    metrics.set_routes({route.path for route in app.routes})
+    app.middleware("http")(metrics.middleware)
 
     run(app, host=HOST, port=PORT)
 
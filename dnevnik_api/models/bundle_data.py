@@ -0,0 +1,11 @@
+from pydantic import Field
+
+from models.user_data import UserData
+
+
+class BundleData(UserData):
+
+    datasets: list[str] = Field(
+        alias="datasets",
+        description="Названия наборов данных дневника, например get_summary_marks",
+    )
@@ -1,10 +1,14 @@
+import asyncio
 from typing import Callable, Optional, cast
 from fastapi import APIRouter
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Response
 from functools import wraps
 
+import orjson
+
 from routers.abstract import AbstractRouter
 from models.user_data import UserData
+from models.bundle_data import BundleData
 from src.parser import AbstractParser
 
 
@@ -19,9 +23,24 @@ def require_cookies(endpoint: Callable) -> Callable:
 
 
 class DnevnikRouter(AbstractRouter):
-    def __init__(self, parser: AbstractParser, prefix: str = "/dnevnik") -> None:
+    DEFAULT_BUNDLE_CONCURRENCY: int = 4
+
+    def __init__(
+        self, parser: AbstractParser, prefix: str = "/dnevnik", bundle_concurrency: int = DEFAULT_BUNDLE_CONCURRENCY
+    ) -> None:
         self.__parser: AbstractParser = parser
         self.__router: APIRouter = APIRouter(prefix=prefix)
+        self.__bundle_concurrency: int = bundle_concurrency
+
+        self.__datasets: dict[str, Callable] = {
+            "get_person_data": self.__parser.get_person_data,
+            "get_summary_marks": self.__parser.get_summary_marks,
+            "get_diary": self.__parser.get_diary,
+            "get_week_schedule": self.__parser.get_week_schedule,
+            "get_school_info": self.__parser.get_school_info,
+            "get_homework_from_range": self.__parser.get_homework_from_range,
+            "get_missed_lessons": self.__parser.get_missed_lessons,
+        }
 
         self.__register_paths: dict = {
             "get_person_data": self.__get_person_data,
@@ -31,6 +50,7 @@ class DnevnikRouter(AbstractRouter):
             "get_school_info": self.__get_school_info,
             "get_homework_from_range": self.__get_homework_from_range,
             "get_missed_lessons": self.__get_missed_lessons,
+            "bundle": self.__get_bundle,
         }
 
         self.__routs_register()
@@ -39,50 +59,77 @@ class DnevnikRouter(AbstractRouter):
         for path, endpoint in self.__register_paths.items():
             self.__router.add_api_route(f"/{path}", endpoint, methods=["POST"], response_model=Optional[dict])
 
-    async def __parser_call(self, parser_method: Callable, cookies: dict) -> dict:
+    async def __parser_call(self, parser_method: Callable, cookies: dict) -> Response:
+        """Отдаёт JSON от парсера как есть, без повторного разбора и сериализации."""
         try:
-            result = await parser_method(cookies)
+            result: bytes | None = await parser_method(cookies)
             if result is None:
                 raise HTTPException(404, "Data not found")
-            return result
+            return Response(result, media_type="application/json")
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(500, f"Parser error: {str(e)}")
 
     @require_cookies
-    async def __get_person_data(self, data: UserData) -> dict | None:
+    async def __get_person_data(self, data: UserData) -> Response:
         cookies = cast(dict, data.cookies)
         return await self.__parser_call(self.__parser.get_person_data, cookies)
 
     @require_cookies
-    async def __get_summary_marks(self, data: UserData) -> dict | None:
+    async def __get_summary_marks(self, data: UserData) -> Response:
         cookies = cast(dict, data.cookies)
         return await self.__parser_call(self.__parser.get_summary_marks, cookies)
 
     @require_cookies
-    async def __get_diary(self, data: UserData) -> dict | None:
+    async def __get_diary(self, data: UserData) -> Response:
         cookies = cast(dict, data.cookies)
         return await self.__parser_call(self.__parser.get_diary, cookies)
 
     @require_cookies
-    async def __get_week_schedule(self, data: UserData) -> dict | None:
+    async def __get_week_schedule(self, data: UserData) -> Response:
         cookies = cast(dict, data.cookies)
         return await self.__parser_call(self.__parser.get_week_schedule, cookies)
 
     @require_cookies
-    async def __get_school_info(self, data: UserData) -> dict | None:
+    async def __get_school_info(self, data: UserData) -> Response:
         cookies = cast(dict, data.cookies)
         return await self.__parser_call(self.__parser.get_school_info, cookies)
 
     @require_cookies
-    async def __get_homework_from_range(self, data: UserData) -> dict | None:
+    async def __get_homework_from_range(self, data: UserData) -> Response:
         cookies = cast(dict, data.cookies)
         return await self.__parser_call(self.__parser.get_homework_from_range, cookies)
 
     @require_cookies
-    async def __get_missed_lessons(self, data: UserData) -> dict | None:
+    async def __get_missed_lessons(self, data: UserData) -> Response:
         cookies = cast(dict, data.cookies)
         return await self.__parser_call(self.__parser.get_missed_lessons, cookies)
 
+    @require_cookies
+    async def __get_bundle(self, data: BundleData) -> Response:
+        cookies = cast(dict, data.cookies)
+        semaphore: asyncio.Semaphore = asyncio.Semaphore(self.__bundle_concurrency)
+
+        async def load(name: str) -> bytes:
+            parser_method: Callable | None = self.__datasets.get(name)
+            if parser_method is None:
+                return orjson.dumps({"status": "unknown", "data": None})
+            async with semaphore:
+                try:
+                    result: bytes | None = await parser_method(cookies)
+                except Exception as e:
+                    return orjson.dumps({"status": "error", "data": None, "detail": f"Parser error: {str(e)}"})
+            if result is None:
+                return orjson.dumps({"status": "not_found", "data": None})
+            return b'{"status":"ok","data":' + result + b"}"
+
+        # Ответ собирается из готовых байтов наборов данных, без их разбора
+        names: list[str] = list(dict.fromkeys(data.datasets))
+        results: list[bytes] = await asyncio.gather(*(load(name) for name in names))
+        content: bytes = b"{" + b",".join(orjson.dumps(name) + b":" + item for name, item in zip(names, results)) + b"}"
+        return Response(content, media_type="application/json")
+
     def get_router(self) -> APIRouter:
         return self.__router
 
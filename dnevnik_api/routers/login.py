@@ -4,6 +4,7 @@ from fastapi import APIRouter, HTTPException, status
 from routers.abstract import AbstractRouter
 from models.user_data import UserData
 from src.login_parser import AbstractLoginParser
+from src.login_sessions import TooManyPendingLogins
 
 
 class LoginRouter(AbstractRouter):
@@ -27,7 +28,7 @@ class LoginRouter(AbstractRouter):
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Login and password are required")
 
         try:
-            result: bool = await self.__parser.login(data.login, data.password)
+            result: bool = await self.__parser.login(data.id, data.login, data.password)
             if not result:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND, detail="Invalid credentials or user not found"
@@ -35,6 +36,8 @@ class LoginRouter(AbstractRouter):
             return result
         except HTTPException:
             raise
+        except TooManyPendingLogins as e:
+            raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail=str(e)) from e
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Authentication failed: {str(e)}"
@@ -45,12 +48,14 @@ class LoginRouter(AbstractRouter):
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="SMS code is required")
 
         try:
-            result = await self.__parser.sms_login(data.sms_code)
+            result = await self.__parser.sms_login(data.id, data.sms_code)
             if not result:
                 raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Invalid SMS code or session expired")
             return result
         except HTTPException:
             raise
+        except TooManyPendingLogins as e:
+            raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail=str(e)) from e
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"SMS authentication failed: {str(e)}"
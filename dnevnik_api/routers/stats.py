@@ -0,0 +1,68 @@
+from fastapi import APIRouter
+
+from routers.abstract import AbstractRouter
+from src.http_client import HttpClient
+from src.response_cache import ResponseCache
+from src.single_flight import SingleFlight
+from src.browser_pool import BrowserPool
+from src.login_sessions import PendingLoginRegistry
+from utils.cookie import Cookie
+
+
+class StatsRouter(AbstractRouter):
+    def __init__(
+        self,
+        http_client: HttpClient,
+        response_cache: ResponseCache,
+        single_flight: SingleFlight,
+        browser_pool: BrowserPool,
+        login_sessions: PendingLoginRegistry,
+        cookie: Cookie,
+        prefix: str = "/stats",
+    ) -> None:
+        self.__http_client: HttpClient = http_client
+        self.__response_cache: ResponseCache = response_cache
+        self.__single_flight: SingleFlight = single_flight
+        self.__browser_pool: BrowserPool = browser_pool
+        self.__login_sessions: PendingLoginRegistry = login_sessions
+        self.__cookie: Cookie = cookie
+        self.__router: APIRouter = APIRouter(prefix=prefix)
+
+        self.__register_paths: dict = {
+            "http_client": self.__get_http_client_stats,
+            "response_cache": self.__get_response_cache_stats,
+            "single_flight": self.__get_single_flight_stats,
+            "browser_pool": self.__get_browser_pool_stats,
+            "login_sessions": self.__get_login_sessions_stats,
+            "cookies": self.__get_cookies_stats,
+        }
+
+        self.__routs_register()
+
+    def __routs_register(self) -> None:
+        for path, endpoint in self.__register_paths.items():
+            self.__router.add_api_route(f"/{path}", endpoint, methods=["GET"])
+
+    async def __get_http_client_stats(self) -> dict:
+        return self.__http_client.get_stats()
+
+    async def __get_response_cache_stats(self) -> dict:
+        return self.__response_cache.get_stats()
+
+    async def __get_single_flight_stats(self) -> dict:
+        return self.__single_flight.get_stats()
+
+    async def __get_browser_pool_stats(self) -> dict:
+        return self.__browser_pool.get_stats()
+
+    async def __get_login_sessions_stats(self) -> dict:
+        return self.__login_sessions.get_stats()
+
+    async def __get_cookies_stats(self) -> dict:
+        return self.__cookie.get_stats()
+
+    def get_router(self) -> APIRouter:
+        return self.__router
+
+    def get_endpoints(self) -> tuple:
+        return tuple(self.__register_paths.keys())
@@ -0,0 +1,211 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable
+
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.webdriver import WebDriver
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+def create_chrome_browser() -> WebDriver:
+    chrome_options = Options()
+    chrome_options.add_argument("--log-level=3")
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--ignore-certificate-errors")
+    chrome_options.add_argument("--ignore-ssl-errors")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+
+    return webdriver.Chrome(options=chrome_options)
+
+
+class BrowserPoolExhausted(Exception):
+    """Свободный браузер не освободился за отведённое время."""
+
+
+@dataclass
+class PooledBrowser:
+    browser: WebDriver | None = None
+    uses: int = 0
+    # Временный браузер сверх пула, закрывается после использования
+    overflow: bool = False
+
+
+class BrowserPool:
+    """Пул заранее запущенных экземпляров Chrome.
+
+    Каждый браузер очищается после использования (куки, хранилища, вкладки),
+    пересоздаётся после ``max_uses`` входов, при падении или неудачной проверке здоровья.
+    Незавершённый вход держит браузер до ввода кода из SMS, поэтому, когда все браузеры пула заняты,
+    запускается временный браузер сверх пула, не больше ``max_overflow`` одновременно.
+    Если и их лимит исчерпан, а за ``acquire_timeout`` секунд свободный браузер не появился,
+    выбрасывается ``BrowserPoolExhausted``, а не ожидание до таймаута вызывающей стороны.
+    """
+
+    DEFAULT_SIZE: int = 2
+    DEFAULT_MAX_USES: int = 50
+    DEFAULT_ACQUIRE_TIMEOUT: float = 10.0
+    DEFAULT_MAX_OVERFLOW: int = 20
+    RESET_ORIGINS: tuple[str, ...] = ("https://sh-open.ris61edu.ru", "https://esia.gosuslugi.ru")
+
+    def __init__(
+        self,
+        browser_factory: Callable[[], WebDriver] = create_chrome_browser,
+        size: int = DEFAULT_SIZE,
+        max_uses: int = DEFAULT_MAX_USES,
+        acquire_timeout: float = DEFAULT_ACQUIRE_TIMEOUT,
+        max_overflow: int = DEFAULT_MAX_OVERFLOW,
+    ) -> None:
+        self.__browser_factory: Callable[[], WebDriver] = browser_factory
+        self.__size: int = size
+        self.__max_uses: int = max_uses
+        self.__acquire_timeout: float = acquire_timeout
+        self.__max_overflow: int = max_overflow
+        self.__overflow: int = 0
+        self.__queue: asyncio.Queue[PooledBrowser] = asyncio.Queue()
+        self.__slots: list[PooledBrowser] = []
+        self.__release_tasks: set[asyncio.Task] = set()
+
+        self.__acquires: int = 0
+        self.__wait_total: float = 0.0
+        self.__wait_max: float = 0.0
+        self.__recycled: int = 0
+        self.__failed_health_checks: int = 0
+        self.__acquire_timeouts: int = 0
+        self.__overflow_created: int = 0
+
+    async def __run(self, func: Callable, *args):
+        return await asyncio.get_event_loop().run_in_executor(None, func, *args)
+
+    async def __create(self, slot: PooledBrowser) -> None:
+        slot.browser = await self.__run(self.__browser_factory)
+        slot.uses = 0
+
+    async def __quit(self, slot: PooledBrowser) -> None:
+        browser: WebDriver | None = slot.browser
+        slot.browser = None
+        if browser is None:
+            return
+        try:
+            await self.__run(browser.quit)
+        except WebDriverException as e:
+            logger.warning("Failed to quit browser: %s", e)
+
+    async def __is_healthy(self, browser: WebDriver) -> bool:
+        try:
+            return await self.__run(browser.execute_script, "return 1;") == 1
+        except WebDriverException:
+            return False
+
+    def __reset(self, browser: WebDriver) -> None:
+        handles: list[str] = browser.window_handles
+        for handle in handles[1:]:
+            browser.switch_to.window(handle)
+            browser.close()
+        browser.switch_to.window(handles[0])
+        browser.get("about:blank")
+        browser.execute_cdp_cmd("Network.clearBrowserCookies", {})
+        browser.execute_cdp_cmd("Network.clearBrowserCache", {})
+        for origin in self.RESET_ORIGINS:
+            browser.execute_cdp_cmd("Storage.clearDataForOrigin", {"origin": origin, "storageTypes": "all"})
+
+    async def start(self, prewarm: bool = True) -> None:
+        """Создаёт слоты пула; без ``prewarm`` браузер запускается при первой выдаче слота."""
+        self.__slots = [PooledBrowser() for _ in range(self.__size)]
+        if prewarm:
+            results = await asyncio.gather(*(self.__create(slot) for slot in self.__slots), return_exceptions=True)
+            for slot, result in zip(self.__slots, results):
+                if isinstance(result, Exception):
+                    logger.error("Failed to create browser: %s", result)
+        for slot in self.__slots:
+            self.__queue.put_nowait(slot)
+        logger.info("Browser pool started with %s instances", sum(slot.browser is not None for slot in self.__slots))
+
+    async def __prepare(self, slot: PooledBrowser) -> WebDriver:
+        if slot.browser is not None and not await self.__is_healthy(slot.browser):
+            self.__failed_health_checks += 1
+            await self.__quit(slot)
+        if slot.browser is None:
+            await self.__create(slot)
+        slot.uses += 1
+        return slot.browser  # type: ignore[return-value]
+
+    async def __release(self, slot: PooledBrowser, healthy: bool) -> None:
+        if slot.overflow:
+            try:
+                await self.__quit(slot)
+            finally:
+                self.__overflow -= 1
+            return
+        try:
+            recycle: bool = not healthy or slot.uses >= self.__max_uses
+            if slot.browser is not None and not recycle:
+                try:
+                    await self.__run(self.__reset, slot.browser)
+                except WebDriverException as e:
+                    logger.warning("Failed to reset browser: %s", e)
+                    recycle = True
+            if slot.browser is not None and recycle:
+                self.__recycled += 1
+                await self.__quit(slot)
+                await self.__create(slot)
+        except Exception as e:
+            logger.error("Failed to recycle browser: %s", e)
+        finally:
+            self.__queue.put_nowait(slot)
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[WebDriver]:
+        started: float = time.monotonic()
+        slot: PooledBrowser
+        if self.__queue.empty() and self.__overflow < self.__max_overflow:
+            slot = PooledBrowser(overflow=True)
+            self.__overflow += 1
+            self.__overflow_created += 1
+        else:
+            try:
+                slot = await asyncio.wait_for(self.__queue.get(), self.__acquire_timeout)
+            except asyncio.TimeoutError:
+                self.__acquire_timeouts += 1
+                raise BrowserPoolExhausted(f"No free browser in {self.__acquire_timeout} seconds") from None
+        healthy: bool = True
+        try:
+            browser: WebDriver = await self.__prepare(slot)
+            wait: float = time.monotonic() - started
+            self.__acquires += 1
+            self.__wait_total += wait
+            self.__wait_max = max(self.__wait_max, wait)
+            yield browser
+        except WebDriverException:
+            healthy = False
+            raise
+        finally:
+            # Очистка и пересоздание браузера не задерживают ответ пользователю
+            task: asyncio.Task = asyncio.ensure_future(self.__release(slot, healthy))
+            self.__release_tasks.add(task)
+            task.add_done_callback(self.__release_tasks.discard)
+
+    def get_stats(self) -> dict:
+        return {
+            "size": self.__size,
+            "available": self.__queue.qsize(),
+            "running": sum(slot.browser is not None for slot in self.__slots),
+            "acquires": self.__acquires,
+            "acquire_wait_avg": self.__wait_total / self.__acquires if self.__acquires else 0.0,
+            "acquire_wait_max": self.__wait_max,
+            "recycled": self.__recycled,
+            "failed_health_checks": self.__failed_health_checks,
+            "acquire_timeouts": self.__acquire_timeouts,
+            "overflow": self.__overflow,
+            "overflow_created": self.__overflow_created,
+        }
+
+    async def close(self) -> None:
+        await asyncio.gather(*self.__release_tasks, return_exceptions=True)
+        await asyncio.gather(*(self.__quit(slot) for slot in self.__slots))
+        logger.info("Browser pool closed")
@@ -0,0 +1,80 @@
+import logging
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+
+import httpx
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+class HttpClient:
+    """Долгоживущий пул соединений к серверу дневника.
+
+    Один экземпляр создаётся при запуске приложения и закрывается в lifespan FastAPI,
+    поэтому TCP/TLS соединения переиспользуются между запросами пользователей.
+    """
+
+    DEFAULT_MAX_CONNECTIONS: int = 100
+    DEFAULT_MAX_KEEPALIVE: int = 20
+    DEFAULT_KEEPALIVE_EXPIRY: float = 30.0
+
+    def __init__(
+        self,
+        timeout: float,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        max_keepalive: int = DEFAULT_MAX_KEEPALIVE,
+        keepalive_expiry: float = DEFAULT_KEEPALIVE_EXPIRY,
+        http2: bool = False,
+    ) -> None:
+        self.__max_connections: int = max_connections
+        self.__requests_total: int = 0
+        self.__in_flight: int = 0
+        # Куки пользователей передаются заголовком на каждый запрос, общий jar не должен их запоминать
+        jar: CookieJar = CookieJar(policy=DefaultCookiePolicy(allowed_domains=[]))
+        self.__client: httpx.AsyncClient = httpx.AsyncClient(
+            verify=False,
+            http2=http2,
+            timeout=timeout,
+            cookies=jar,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive,
+                keepalive_expiry=keepalive_expiry,
+            ),
+        )
+
+    @staticmethod
+    def __cookie_header(cookies: dict) -> dict:
+        return {"Cookie": "; ".join(f"{name}={value}" for name, value in cookies.items())}
+
+    async def request(self, method: str, url: str, cookies: dict, data: dict | None = None) -> httpx.Response:
+        self.__requests_total += 1
+        self.__in_flight += 1
+        try:
+            return await self.__client.request(method, url, headers=self.__cookie_header(cookies), data=data)
+        finally:
+            self.__in_flight -= 1
+
+    def get_stats(self) -> dict:
+        in_use: int = 0
+        idle: int = 0
+        waiting: int = 0
+        pool = getattr(self.__client._transport, "_pool", None)  # pylint: disable=protected-access
+        if pool is not None:
+            for connection in pool.connections:
+                if connection.is_idle():
+                    idle += 1
+                elif not connection.is_closed():
+                    in_use += 1
+            waiting = sum(1 for request in getattr(pool, "_requests", []) if request.is_queued())
+        return {
+            "max_connections": self.__max_connections,
+            "in_use": in_use,
+            "idle": idle,
+            "waiting": waiting,
+            "in_flight": self.__in_flight,
+            "requests_total": self.__requests_total,
+        }
+
+    async def close(self) -> None:
+        await self.__client.aclose()
+        logger.info("HTTP клиент закрыт")
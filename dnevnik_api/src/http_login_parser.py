@@ -0,0 +1,173 @@
+import asyncio
+import logging
+from contextlib import AsyncExitStack
+from typing import Any, Optional
+
+import aiohttp
+from aiohttp.abc import AbstractCookieJar
+from yarl import URL
+
+from src.login_parser import AbstractLoginParser, LoginParser
+from src.login_sessions import PendingLoginRegistry
+from utils.cookie import Cookie
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+class LoginFallbackRequired(Exception):
+    """ESIA вернула капчу или неожиданную страницу, вход нужно пройти через браузер."""
+
+
+class HttpLoginParser(AbstractLoginParser):
+    """Вход через ESIA без браузера: редиректы, форма и OTP выполняются HTTP запросами.
+
+    HTTP сессия пользователя живёт в реестре незавершённых входов между шагами.
+    При передаче шага браузерному движку куки сохраняются в формате :class:`LoginParser`.
+    """
+
+    DEFAULT_TIMEOUT = LoginParser.DEFAULT_TIMEOUT
+    LOGIN_URL = LoginParser.LOGIN_URL
+    VERIFY_URL = LoginParser.VERIFY_URL
+    MAX_SKIP_URL = LoginParser.MAX_SKIP_URL
+    ESIA_LOGIN_API_URL = "https://esia.gosuslugi.ru/aas/oauth2/api/login"
+    ESIA_HOST = "esia.gosuslugi.ru"
+    DNEVNIK_URL = URL("https://sh-open.ris61edu.ru")
+
+    # Ответы API входа ESIA, после которых ожидается ввод кода из SMS
+    OTP_ACTIONS: frozenset[str] = frozenset({"ENTER_MFA", "ENTER_OTP"})
+    DONE_ACTIONS: frozenset[str] = frozenset({"DONE"})
+
+    HEADERS: dict[str, str] = {
+        "Accept": "application/json, text/plain, */*",
+        "User-Agent": (
+            "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/128.0.0.0 Safari/537.36"
+        ),
+        "Origin": "https://esia.gosuslugi.ru",
+        "Referer": "https://esia.gosuslugi.ru/login/",
+    }
+
+    def __init__(
+        self,
+        sessions: PendingLoginRegistry,
+        cookie: Cookie,
+        fallback: LoginParser | None = None,
+        timeout: float = DEFAULT_TIMEOUT,
+    ) -> None:
+        self.__sessions: PendingLoginRegistry = sessions
+        self.__cookie: Cookie = cookie
+        self.__fallback: LoginParser | None = fallback
+        self.__timeout: aiohttp.ClientTimeout = aiohttp.ClientTimeout(total=timeout)
+
+    def __session(self, jar: aiohttp.CookieJar) -> aiohttp.ClientSession:
+        return aiohttp.ClientSession(cookie_jar=jar, headers=self.HEADERS, timeout=self.__timeout)
+
+    async def __save_jar(self, jar: AbstractCookieJar, name: str) -> None:
+        cookies: list[dict[str, Any]] = [
+            {
+                "name": morsel.key,
+                "value": morsel.value,
+                "domain": morsel["domain"] or self.ESIA_HOST,
+                "path": morsel["path"] or "/",
+            }
+            for morsel in jar
+        ]
+        await self.__cookie.save_cookies(cookies, name)
+
+    @staticmethod
+    async def __json(response: aiohttp.ClientResponse) -> dict:
+        if response.content_type != "application/json":
+            raise LoginFallbackRequired(f"Unexpected content type {response.content_type} from {response.url}")
+        payload = await response.json()
+        if not isinstance(payload, dict):
+            raise LoginFallbackRequired(f"Unexpected payload from {response.url}")
+        if "captcha" in str(payload.get("action", "")).lower() or payload.get("captcha_required"):
+            raise LoginFallbackRequired("Captcha requested")
+        return payload
+
+    async def __http_login(self, user_id: int, login: str, password: str) -> bool:
+        async with AsyncExitStack() as stack:
+            session: aiohttp.ClientSession = await stack.enter_async_context(self.__session(aiohttp.CookieJar()))
+            async with session.get(self.LOGIN_URL) as response:
+                if response.url.host != self.ESIA_HOST:
+                    raise LoginFallbackRequired(f"Unexpected redirect to {response.url}")
+
+            async with session.post(self.ESIA_LOGIN_API_URL, json={"login": login, "password": password}) as response:
+                if response.status in (400, 401, 403):
+                    logger.warning("ESIA rejected credentials with status: %s", response.status)
+                    return False
+                if response.status != 200:
+                    raise LoginFallbackRequired(f"Login request failed with status: {response.status}")
+                payload: dict = await self.__json(response)
+
+            action: str = str(payload.get("action", ""))
+            if action not in self.OTP_ACTIONS:
+                raise LoginFallbackRequired(f"Unexpected login action: {action}")
+
+            await self.__sessions.add(user_id, session, stack.pop_all())
+            logger.info("Login successful")
+            return True
+
+    async def __http_sms_login(self, user_id: int, session: aiohttp.ClientSession, sms_code: str) -> Optional[dict]:
+        jar = session.cookie_jar
+        try:
+            redirect_url: str | None = None
+            async with session.post(self.VERIFY_URL, params={"code": sms_code}) as response:
+                if response.status not in (200, 202):
+                    logger.warning("Verify request failed with status: %s", response.status)
+                    return None
+                payload: dict = await self.__json(response)
+                redirect_url = payload.get("redirect_url")
+
+            if str(payload.get("action", "")) not in self.DONE_ACTIONS:
+                async with session.post(self.MAX_SKIP_URL) as response:
+                    if response.status != 200:
+                        logger.warning("Verify request failed with status: %s", response.status)
+                    else:
+                        redirect_url = (await self.__json(response)).get("redirect_url") or redirect_url
+
+            async with session.get(redirect_url or self.LOGIN_URL) as response:
+                if response.url.host != self.DNEVNIK_URL.host:
+                    raise LoginFallbackRequired(f"Unexpected redirect to {response.url}")
+
+            session_cookie = jar.filter_cookies(self.DNEVNIK_URL).get("sessionid")
+            if session_cookie is None:
+                raise LoginFallbackRequired("Session cookie not found")
+            return {session_cookie.key: session_cookie.value}
+        except LoginFallbackRequired:
+            # Код уже принят ESIA, браузер продолжит с сохранённой сессией без повторной проверки
+            await self.__save_jar(jar, str(user_id))
+            raise
+
+    async def login(self, user_id: int, login: str, password: str) -> bool:
+        self.__sessions.check_capacity(user_id)
+        try:
+            return await self.__http_login(user_id, login, password)
+        except LoginFallbackRequired as e:
+            logger.warning("HTTP login requires browser: %s", e)
+            if self.__fallback is None:
+                return False
+            return await self.__fallback.login(user_id, login, password)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error("Login failed: %s", e)
+            return False
+
+    async def sms_login(self, user_id: int, sms_code: str) -> Optional[dict]:
+        pending = self.__sessions.get(user_id)
+        if pending is None or not isinstance(pending.session, aiohttp.ClientSession):
+            # Вход начат браузерным движком или уже истёк
+            if self.__fallback is None:
+                return None
+            return await self.__fallback.sms_login(user_id, sms_code)
+
+        self.__sessions.pop(user_id)
+        try:
+            async with pending.exit_stack:
+                return await self.__http_sms_login(user_id, pending.session, sms_code)
+        except LoginFallbackRequired as e:
+            logger.warning("HTTP SMS login requires browser: %s", e)
+            if self.__fallback is None:
+                return None
+            return await self.__fallback.finish_login(user_id)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error("SMS login failed: %s", e)
+            return None
@@ -1,15 +1,12 @@
 import logging
 from abc import ABC, abstractmethod
-from contextlib import asynccontextmanager
-from pathlib import Path
+from contextlib import AsyncExitStack, asynccontextmanager
 from typing import Optional, AsyncIterator
 
 import aiohttp
 from eel import sleep
 from flask import request
-from selenium import webdriver
 from selenium.common.exceptions import TimeoutException, WebDriverException
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.webdriver import WebDriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
@@ -18,6 +15,8 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
 import asyncio
 
+from src.browser_pool import BrowserPool, BrowserPoolExhausted
+from src.login_sessions import PendingLoginRegistry, TooManyPendingLogins
 from utils.cookie import Cookie
 
 logger: logging.Logger = logging.getLogger(__name__)
@@ -25,11 +24,11 @@ logger: logging.Logger = logging.getLogger(__name__)
 
 class AbstractLoginParser(ABC):
     @abstractmethod
-    async def login(self, login: str, password: str) -> bool:
+    async def login(self, user_id: int, login: str, password: str) -> bool:
         pass
 
     @abstractmethod
-    async def sms_login(self, sms_code: str) -> Optional[dict]:
+    async def sms_login(self, user_id: int, sms_code: str) -> Optional[dict]:
         pass
 
 
@@ -44,34 +43,29 @@ class LoginParser(AbstractLoginParser):
     PASSWORD_INPUT_LOCATOR = (By.ID, "password")
     PERSONAL_AREA_LINK_LOCATOR = (By.XPATH, "/html/body/section/section[1]/div/section[2]/div/a")
 
-    def __init__(self, timeout: float = DEFAULT_TIMEOUT, cookie_path: str = "cookies") -> None:
+    def __init__(
+        self,
+        browser_pool: BrowserPool,
+        sessions: PendingLoginRegistry,
+        cookie: Cookie,
+        timeout: float = DEFAULT_TIMEOUT,
+    ) -> None:
+        self.__browser_pool: BrowserPool = browser_pool
+        self.__sessions: PendingLoginRegistry = sessions
+        self.__cookie: Cookie = cookie
         self.__timeout = timeout
-        self.__cookie = Cookie(Path(cookie_path))
-
-    def __create_browser(self) -> WebDriver:
-        chrome_options = Options()
-        chrome_options.add_argument("--log-level=3")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--ignore-certificate-errors")
-        chrome_options.add_argument("--ignore-ssl-errors")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-
-        return webdriver.Chrome(options=chrome_options)
 
     @asynccontextmanager
     async def __browser_context(self) -> AsyncIterator[WebDriver]:
-        browser: WebDriver | None = None
         try:
-            browser = await asyncio.get_event_loop().run_in_executor(None, self.__create_browser)
-            if browser is None:
-                raise RuntimeError("Failed to create browser instance")
-            yield browser
+            async with self.__browser_pool.acquire() as browser:
+                yield browser
+        except BrowserPoolExhausted as e:
+            # Все браузеры заняты незавершёнными входами, клиент получит 429 вместо зависания
+            raise TooManyPendingLogins(str(e)) from e
         except Exception as e:
-            logger.error(f"Failed to create browser: {str(e)}")
+            logger.error("Browser session failed: %s", e)
             raise
-        finally:
-            if browser is not None:
-                await asyncio.get_event_loop().run_in_executor(None, browser.quit)
 
     async def __wait_for_page_load(self, browser: WebDriver) -> None:
         await asyncio.get_event_loop().run_in_executor(
@@ -114,9 +108,11 @@ class LoginParser(AbstractLoginParser):
         all_cookies = await self.__browser_get_cookies(browser)
         return next((c for c in all_cookies if c.get("name") == name), None)
 
-    async def login(self, login: str, password: str) -> bool:
+    async def login(self, user_id: int, login: str, password: str) -> bool:
+        self.__sessions.check_capacity(user_id)
         try:
-            async with self.__browser_context() as browser:
+            async with AsyncExitStack() as stack:
+                browser: WebDriver = await stack.enter_async_context(self.__browser_context())
                 await self.__browser_get(browser, self.LOGIN_URL)
                 await self.__wait_for_page_load(browser)
 
@@ -130,63 +126,94 @@ class LoginParser(AbstractLoginParser):
 
                 await self.__wait_for_page_load(browser)
 
-                cookies = await self.__browser_get_cookies(browser)
-                await asyncio.get_event_loop().run_in_executor(None, self.__cookie.save_cookies, cookies, "user_name")
+                # Браузер остаётся открытым на странице ввода кода до вызова sms_login
+                await self.__sessions.add(user_id, browser, stack.pop_all())
                 logger.info("Login successful")
                 return True
 
         except (TimeoutException, WebDriverException) as e:
-            logger.error(f"Login failed: {str(e)}")
+            logger.error("Login failed: %s", e)
             return False
 
-    async def sms_login(self, sms_code: str) -> Optional[dict]:
+    async def __restore_session(self, browser: WebDriver, cookies: list) -> None:
+        await self.__browser_get(browser, "https://esia.gosuslugi.ru/login/")
+
+        for cookie in cookies:
+            try:
+                if "expiry" in cookie:
+                    cookie["expiry"] = int(cookie["expiry"])
+                await self.__browser_add_cookie(browser, cookie)
+            except Exception as e:
+                logger.warning("Failed to add cookie: %s", e)
+
+        await self.__browser_refresh(browser)
+
+    async def __confirm_sms(self, browser: WebDriver, sms_code: str) -> Optional[dict]:
+        async with aiohttp.ClientSession() as session:
+            browser_cookies = {c["name"]: c["value"] for c in await self.__browser_get_cookies(browser)}
+
+            user_agent = await self.__browser_execute_script(browser, "return navigator.userAgent;")
+
+            headers = {
+                "Content-Type": "application/json",
+                "Accept": "application/json, text/plain, */*",
+                "User-Agent": user_agent,
+                "Origin": "https://esia.gosuslugi.ru",
+                "Referer": "https://esia.gosuslugi.ru/login/",
+            }
+
+            verify_url: str = f"{self.VERIFY_URL}?code={sms_code}"
+            async with session.post(verify_url, headers=headers, cookies=browser_cookies) as response:
+                if response.status != 200 and response.status != 202:
+                    logger.warning("Verify request failed with status: %s", response.status)
+            async with session.post(self.MAX_SKIP_URL, headers=headers, cookies=browser_cookies) as response:
+                if response.status != 200:
+                    logger.warning("Verify request failed with status: %s", response.status)
+
+        return await self.__open_personal_area(browser)
+
+    async def __open_personal_area(self, browser: WebDriver) -> Optional[dict]:
+        await self.__browser_get(browser, self.PERSONAL_AREA_URL)
+        element: WebElement = await self.__find_clickable_element(browser, self.PERSONAL_AREA_LINK_LOCATOR)
+        await self.__element_click(element)
+
+        session_cookie = await self.__browser_get_cookie(browser, "sessionid")
+        if session_cookie:
+            return {session_cookie["name"]: session_cookie["value"]}
+
+        logger.warning("Session cookie not found")
+        return None
+
+    async def sms_login(self, user_id: int, sms_code: str) -> Optional[dict]:
         try:
-            async with self.__browser_context() as browser:
-                await self.__browser_get(browser, "https://esia.gosuslugi.ru/login/")
-                cookies = await asyncio.get_event_loop().run_in_executor(None, self.__cookie.load_cookies, "user_name")
-
-                for cookie in cookies:
-                    try:
-                        if "expiry" in cookie:
-                            cookie["expiry"] = int(cookie["expiry"])
-                        await self.__browser_add_cookie(browser, cookie)
-                    except Exception as e:
-                        logger.warning(f"Failed to add cookie: {str(e)}")
-
-                await self.__browser_refresh(browser)
-
-                async with aiohttp.ClientSession() as session:
-                    browser_cookies = {c["name"]: c["value"] for c in await self.__browser_get_cookies(browser)}
-
-                    user_agent = await self.__browser_execute_script(browser, "return navigator.userAgent;")
-
-                    headers = {
-                        "Content-Type": "application/json",
-                        "Accept": "application/json, text/plain, */*",
-                        "User-Agent": user_agent,
-                        "Origin": "https://esia.gosuslugi.ru",
-                        "Referer": "https://esia.gosuslugi.ru/login/",
-                    }
-
-                    verify_url: str = f"{self.VERIFY_URL}?code={sms_code}"
-                    async with session.post(verify_url, headers=headers, cookies=browser_cookies) as response:
-                        if response.status != 200 and response.status != 202:
-                            logger.warning(f"Verify request failed with status: {response.status}")
-                    async with session.post(self.MAX_SKIP_URL, headers=headers, cookies=browser_cookies) as response:
-                        if response.status != 200:
-                            logger.warning(f"Verify request failed with status: {response.status}")
-
-                await self.__browser_get(browser, self.PERSONAL_AREA_URL)
-                element: WebElement = await self.__find_clickable_element(browser, self.PERSONAL_AREA_LINK_LOCATOR)
-                await self.__element_click(element)
-
-                session_cookie = await self.__browser_get_cookie(browser, "sessionid")
-                if session_cookie:
-                    return {session_cookie["name"]: session_cookie["value"]}
-
-                logger.warning("Session cookie not found")
+            pending = self.__sessions.pop(user_id)
+            if pending is not None and isinstance(pending.session, WebDriver):
+                async with pending.exit_stack:
+                    return await self.__confirm_sms(pending.session, sms_code)
+            if pending is not None:
+                await pending.exit_stack.aclose()
+            logger.warning("Pending login not found")
+            return None
+
+        except (TimeoutException, WebDriverException) as e:
+            logger.error("SMS login failed: %s", e)
+            return None
+
+    async def finish_login(self, user_id: int) -> Optional[dict]:
+        """Завершает вход, код из SMS для которого уже подтверждён другим движком.
+
+        Сессия ESIA восстанавливается из сохранённых кук, повторная проверка кода не выполняется:
+        одноразовый код к этому моменту уже использован.
+        """
+        try:
+            cookies = await self.__cookie.load_cookies(str(user_id))
+            if not cookies:
+                logger.warning("Saved login session not found")
                 return None
+            async with self.__browser_context() as browser:
+                await self.__restore_session(browser, cookies)
+                return await self.__open_personal_area(browser)
 
         except (TimeoutException, WebDriverException) as e:
-            logger.error(f"SMS login failed: {str(e)}")
+            logger.error("Finishing login failed: %s", e)
             return None
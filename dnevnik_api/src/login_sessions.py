@@ -0,0 +1,108 @@
+import asyncio
+import logging
+import time
+from contextlib import AsyncExitStack, suppress
+from dataclasses import dataclass
+from typing import Any
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+class TooManyPendingLogins(Exception):
+    """Достигнут лимит одновременно незавершённых входов."""
+
+
+@dataclass
+class PendingLogin:
+    session: Any
+    exit_stack: AsyncExitStack
+    expires_at: float
+
+
+class PendingLoginRegistry:
+    """Живые сессии входа (браузер или HTTP клиент) между шагами login() и sms_login().
+
+    Сессии хранятся по Telegram id пользователя, брошенные входы закрываются по истечении ``ttl``.
+    """
+
+    DEFAULT_TTL: float = 300.0
+    DEFAULT_MAX_SESSIONS: int = 20
+    DEFAULT_SWEEP_INTERVAL: float = 30.0
+
+    def __init__(
+        self,
+        ttl: float = DEFAULT_TTL,
+        max_sessions: int = DEFAULT_MAX_SESSIONS,
+        sweep_interval: float = DEFAULT_SWEEP_INTERVAL,
+    ) -> None:
+        self.__ttl: float = ttl
+        self.__max_sessions: int = max_sessions
+        self.__sweep_interval: float = sweep_interval
+        self.__sessions: dict[int, PendingLogin] = {}
+        self.__sweeper: asyncio.Task | None = None
+        self.__expired: int = 0
+
+    def check_capacity(self, user_id: int) -> None:
+        if user_id not in self.__sessions and len(self.__sessions) >= self.__max_sessions:
+            raise TooManyPendingLogins(f"Too many pending logins: {self.__max_sessions}")
+
+    async def add(self, user_id: int, session: Any, exit_stack: AsyncExitStack) -> None:
+        previous: PendingLogin | None = self.__sessions.pop(user_id, None)
+        if previous is not None:
+            await self.__close(previous)
+        try:
+            self.check_capacity(user_id)
+        except TooManyPendingLogins:
+            await exit_stack.aclose()
+            raise
+        self.__sessions[user_id] = PendingLogin(session, exit_stack, time.monotonic() + self.__ttl)
+
+    def get(self, user_id: int) -> PendingLogin | None:
+        pending: PendingLogin | None = self.__sessions.get(user_id)
+        if pending is None or pending.expires_at <= time.monotonic():
+            return None
+        return pending
+
+    def pop(self, user_id: int) -> PendingLogin | None:
+        pending: PendingLogin | None = self.get(user_id)
+        if pending is not None:
+            del self.__sessions[user_id]
+        return pending
+
+    @staticmethod
+    async def __close(pending: PendingLogin) -> None:
+        try:
+            await pending.exit_stack.aclose()
+        except Exception as e:
+            logger.warning("Failed to close pending login: %s", e)
+
+    async def __sweep(self) -> None:
+        while True:
+            await asyncio.sleep(self.__sweep_interval)
+            now: float = time.monotonic()
+            expired: list[int] = [user_id for user_id, pending in self.__sessions.items() if pending.expires_at <= now]
+            for user_id in expired:
+                pending: PendingLogin = self.__sessions.pop(user_id)
+                self.__expired += 1
+                await self.__close(pending)
+            if expired:
+                logger.info("Closed %s abandoned logins", len(expired))
+
+    async def start(self) -> None:
+        self.__sweeper = asyncio.create_task(self.__sweep())
+
+    async def close(self) -> None:
+        if self.__sweeper is not None:
+            self.__sweeper.cancel()
+            with suppress(asyncio.CancelledError):
+                await self.__sweeper
+        sessions: list[PendingLogin] = list(self.__sessions.values())
+        self.__sessions.clear()
+        await asyncio.gather(*(self.__close(pending) for pending in sessions))
+
+    def get_stats(self) -> dict:
+        return {
+            "pending": len(self.__sessions),
+            "max_sessions": self.__max_sessions,
+            "expired": self.__expired,
+        }
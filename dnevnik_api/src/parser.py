@@ -1,50 +1,80 @@
 import abc
 import logging
 import httpx
+import orjson
 from datetime import datetime
+from typing import Awaitable, Hashable
+
+from src.http_client import HttpClient
+from src.response_cache import CacheState, ResponseCache
+from src.single_flight import SingleFlight
+from utils.metrics import Instrument
+from utils.tracing import span
 
 logger: logging.Logger = logging.getLogger(__name__)
 
+UPSTREAM_REQUESTS: Instrument = Instrument("upstream_request", "Запросы к серверу дневника", ("endpoint",))
+
 
 class AbstractParser(abc.ABC):
     def __init__(self) -> None:
         pass
 
-    async def get_person_data(self, cookies: dict) -> dict | None:
+    async def get_person_data(self, cookies: dict) -> bytes | None:
         pass
 
-    async def get_summary_marks(self, cookies: dict) -> dict | None:
+    async def get_summary_marks(self, cookies: dict) -> bytes | None:
         pass
 
-    async def get_diary(self, cookies: dict) -> dict | None:
+    async def get_diary(self, cookies: dict) -> bytes | None:
         pass
 
-    async def get_week_schedule(self, cookies: dict) -> dict | None:
+    async def get_week_schedule(self, cookies: dict) -> bytes | None:
         pass
 
-    async def get_school_info(self, cookies: dict) -> dict | None:
+    async def get_school_info(self, cookies: dict) -> bytes | None:
         pass
 
-    async def get_homework_from_range(self, cookies: dict) -> dict | None:
+    async def get_homework_from_range(self, cookies: dict) -> bytes | None:
         pass
 
-    async def get_missed_lessons(self, cookies: dict) -> dict | None:
+    async def get_missed_lessons(self, cookies: dict) -> bytes | None:
         pass
 
 
 class Parser(AbstractParser):
-    def __init__(self, timeout: float) -> None:
-        self.__timeout: float = timeout
+    # Время жизни (ttl, stale-while-revalidate) ответов в секундах для каждого эндпоинта
+    CACHE_TTL: dict[str, tuple[float, float]] = {
+        "get_person_data": (24 * 3600.0, 24 * 3600.0),
+        "get_school_info": (24 * 3600.0, 24 * 3600.0),
+        "get_summary_marks": (300.0, 3600.0),
+        "get_diary": (300.0, 3600.0),
+        "get_week_schedule": (900.0, 3600.0),
+        "get_homework_from_range": (300.0, 3600.0),
+        "get_missed_lessons": (900.0, 3600.0),
+    }
+
+    DEFAULT_BASE_URL: str = "https://sh-open.ris61edu.ru"
+
+    def __init__(
+        self,
+        client: HttpClient,
+        cache: ResponseCache,
+        single_flight: SingleFlight,
+        base_url: str = DEFAULT_BASE_URL,
+    ) -> None:
+        self.__client: HttpClient = client
+        self.__cache: ResponseCache = cache
+        self.__single_flight: SingleFlight = single_flight
+        # Адрес сервера дневника, для нагрузочных тестов подменяется локальной заглушкой
+        self.__base_url: str = base_url.rstrip("/")
 
     async def __request(self, url: str, cookies: dict, data: dict | None = None) -> httpx.Response | None:
         try:
-            async with httpx.AsyncClient(verify=False) as client:
-                if data:
-                    response: httpx.Response = await client.post(
-                        url, cookies=cookies, timeout=self.__timeout, data=data
-                    )
-                else:
-                    response: httpx.Response = await client.get(url, cookies=cookies, timeout=self.__timeout)
+            if data:
+                response: httpx.Response = await self.__client.request("POST", url, cookies, data)
+            else:
+                response: httpx.Response = await self.__client.request("GET", url, cookies)
             response.raise_for_status()
             return response
         except httpx.ReadTimeout as exc:
@@ -57,59 +87,85 @@ class Parser(AbstractParser):
             logger.error("Неизвестная ошибка %s", exc)
         return None
 
-    async def get_person_data(self, cookies: dict) -> dict | None:
-        url: str = "https://sh-open.ris61edu.ru/api/ProfileService/GetPersonData"
-        response: httpx.Response | None = await self.__request(url, cookies)
-        if response is None:
-            logger.warning("Ошибка парсинга личных данных пользователя")
-            return None
-        return response.json()
-
-    async def get_summary_marks(self, cookies: dict) -> dict | None:
-        url: str = f"https://sh-open.ris61edu.ru/api/MarkService/GetSummaryMarks?date={datetime.today().date()}"
-        response: httpx.Response | None = await self.__request(url, cookies)
-        if response is None:
-            logger.warning("Ошибка парсинга суммарных оценок пользователя")
-            return None
-        return response.json()
-
-    async def get_diary(self, cookies: dict) -> dict | None:
-        data = {"date": f"{datetime.today().date()}", "is_diary": False}
-        url: str = "https://sh-open.ris61edu.ru/api/ScheduleService/GetDiary"
-        response: httpx.Response | None = await self.__request(url, cookies, data)
-        if response is None:
-            logger.warning("Ошибка парсинга дневника")
-            return None
-        return response.json()
+    @staticmethod
+    def __cache_key(endpoint: str, cookies: dict, date: str | None) -> Hashable:
+        session: Hashable = cookies.get("sessionid") or tuple(sorted(cookies.items()))
+        return session, endpoint, date
 
-    async def get_week_schedule(self, cookies: dict) -> dict | None:
-        url: str = f"https://sh-open.ris61edu.ru/api/ScheduleService/GetWeekSchedule?date={datetime.today().date()}"
-        response: httpx.Response | None = await self.__request(url, cookies)
+    async def __fetch(
+        self, key: Hashable, endpoint: str, url: str, cookies: dict, data: dict | None, error_message: str
+    ) -> bytes | None:
+        with UPSTREAM_REQUESTS.track(endpoint=endpoint):
+            response: httpx.Response | None = await self.__request(url, cookies, data)
         if response is None:
-            logger.warning("Ошибка парсинга недельного расписания")
+            UPSTREAM_REQUESTS.errors.inc(endpoint=endpoint)
+            logger.warning(error_message)
             return None
-        return response.json()
-
-    async def get_school_info(self, cookies: dict) -> dict | None:
-        url: str = "https://sh-open.ris61edu.ru/api/SchoolService/getSchoolInfo"
-        response: httpx.Response | None = await self.__request(url, cookies)
-        if response is None:
-            logger.warning("Ошибка парсинга школьной информации")
-            return None
-        return response.json()
-
-    async def get_homework_from_range(self, cookies: dict) -> dict | None:
-        url: str = "https://sh-open.ris61edu.ru/api/HomeworkService/GetHomeworkFromRange"
-        response: httpx.Response | None = await self.__request(url, cookies)
-        if response is None:
-            logger.warning("Ошибка парсинга расписания в промежутке")
-            return None
-        return response.json()
-
-    async def get_missed_lessons(self, cookies: dict) -> dict | None:
-        url: str = "https://sh-open.ris61edu.ru/api/ScheduleService/GetMissedLessons"
-        response: httpx.Response | None = await self.__request(url, cookies)
-        if response is None:
-            logger.warning("Ошибка парсинга пропущенных уроков")
+        # Ответ только проверяется на корректность JSON, дальше и из кэша отдаются байты сервера как есть
+        content: bytes = response.content
+        try:
+            with span("json_validate"):
+                orjson.loads(content)
+        except orjson.JSONDecodeError:
+            UPSTREAM_REQUESTS.errors.inc(endpoint=endpoint)
+            logger.warning("%s: ответ не в формате JSON", error_message)
             return None
-        return response.json()
+        ttl, stale_ttl = self.CACHE_TTL[endpoint]
+        self.__cache.set(key, content, len(content), ttl, stale_ttl)
+        return content
+
+    async def __get(
+        self,
+        endpoint: str,
+        url: str,
+        cookies: dict,
+        error_message: str,
+        date: str | None = None,
+        data: dict | None = None,
+    ) -> bytes | None:
+        key: Hashable = self.__cache_key(endpoint, cookies, date)
+
+        def fetch() -> Awaitable[bytes | None]:
+            return self.__fetch(key, endpoint, url, cookies, data, error_message)
+
+        state, value = self.__cache.get(key)
+        if state is CacheState.FRESH:
+            return value
+        if state is CacheState.STALE:
+            self.__single_flight.start(key, fetch)
+            return value
+        return await self.__single_flight.do(key, fetch)
+
+    async def get_person_data(self, cookies: dict) -> bytes | None:
+        url: str = f"{self.__base_url}/api/ProfileService/GetPersonData"
+        return await self.__get("get_person_data", url, cookies, "Ошибка парсинга личных данных пользователя")
+
+    async def get_summary_marks(self, cookies: dict) -> bytes | None:
+        date: str = f"{datetime.today().date()}"
+        url: str = f"{self.__base_url}/api/MarkService/GetSummaryMarks?date={date}"
+        return await self.__get(
+            "get_summary_marks", url, cookies, "Ошибка парсинга суммарных оценок пользователя", date
+        )
+
+    async def get_diary(self, cookies: dict) -> bytes | None:
+        date: str = f"{datetime.today().date()}"
+        data = {"date": date, "is_diary": False}
+        url: str = f"{self.__base_url}/api/ScheduleService/GetDiary"
+        return await self.__get("get_diary", url, cookies, "Ошибка парсинга дневника", date, data)
+
+    async def get_week_schedule(self, cookies: dict) -> bytes | None:
+        date: str = f"{datetime.today().date()}"
+        url: str = f"{self.__base_url}/api/ScheduleService/GetWeekSchedule?date={date}"
+        return await self.__get("get_week_schedule", url, cookies, "Ошибка парсинга недельного расписания", date)
+
+    async def get_school_info(self, cookies: dict) -> bytes | None:
+        url: str = f"{self.__base_url}/api/SchoolService/getSchoolInfo"
+        return await self.__get("get_school_info", url, cookies, "Ошибка парсинга школьной информации")
+
+    async def get_homework_from_range(self, cookies: dict) -> bytes | None:
+        url: str = f"{self.__base_url}/api/HomeworkService/GetHomeworkFromRange"
+        return await self.__get("get_homework_from_range", url, cookies, "Ошибка парсинга расписания в промежутке")
+
+    async def get_missed_lessons(self, cookies: dict) -> bytes | None:
+        url: str = f"{self.__base_url}/api/ScheduleService/GetMissedLessons"
+        return await self.__get("get_missed_lessons", url, cookies, "Ошибка парсинга пропущенных уроков")
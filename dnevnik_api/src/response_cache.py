@@ -0,0 +1,84 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Hashable
+
+
+class CacheState(Enum):
+    FRESH = "fresh"
+    STALE = "stale"
+    MISS = "miss"
+
+
+@dataclass
+class CacheEntry:
+    value: Any
+    size: int
+    expires_at: float
+    stale_until: float
+
+
+class ResponseCache:
+    """LRU кэш ответов сервера дневника с TTL и окном stale-while-revalidate.
+
+    Размер записи оценивается по длине тела ответа, при превышении ``max_bytes``
+    вытесняются давно не использованные записи.
+    """
+
+    DEFAULT_MAX_BYTES: int = 64 * 1024 * 1024
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.__max_bytes: int = max_bytes
+        self.__entries: OrderedDict[Hashable, CacheEntry] = OrderedDict()
+        self.__size: int = 0
+        self.__hits: int = 0
+        self.__stale_hits: int = 0
+        self.__misses: int = 0
+        self.__evictions: int = 0
+
+    def get(self, key: Hashable) -> tuple[CacheState, Any]:
+        entry: CacheEntry | None = self.__entries.get(key)
+        now: float = time.monotonic()
+        if entry is None or entry.stale_until <= now:
+            if entry is not None:
+                self.__remove(key)
+            self.__misses += 1
+            return CacheState.MISS, None
+
+        self.__entries.move_to_end(key)
+        if entry.expires_at > now:
+            self.__hits += 1
+            return CacheState.FRESH, entry.value
+        self.__stale_hits += 1
+        return CacheState.STALE, entry.value
+
+    def set(self, key: Hashable, value: Any, size: int, ttl: float, stale_ttl: float = 0.0) -> None:
+        if size > self.__max_bytes:
+            return
+        if key in self.__entries:
+            self.__remove(key)
+
+        now: float = time.monotonic()
+        self.__entries[key] = CacheEntry(value, size, now + ttl, now + ttl + stale_ttl)
+        self.__size += size
+
+        while self.__size > self.__max_bytes:
+            oldest_key: Hashable = next(iter(self.__entries))
+            self.__remove(oldest_key)
+            self.__evictions += 1
+
+    def __remove(self, key: Hashable) -> None:
+        entry: CacheEntry = self.__entries.pop(key)
+        self.__size -= entry.size
+
+    def get_stats(self) -> dict:
+        return {
+            "entries": len(self.__entries),
+            "size_bytes": self.__size,
+            "max_bytes": self.__max_bytes,
+            "hits": self.__hits,
+            "stale_hits": self.__stale_hits,
+            "misses": self.__misses,
+            "evictions": self.__evictions,
+        }
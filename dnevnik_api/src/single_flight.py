@@ -0,0 +1,46 @@
+import asyncio
+from typing import Awaitable, Callable, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Объединение одинаковых одновременных запросов в один.
+
+    Все вызывающие с одинаковым ключом ждут одну задачу. Отмена одного из ожидающих
+    не отменяет общую задачу, а ошибка или отмена самой задачи передаётся всем ожидающим.
+    """
+
+    def __init__(self) -> None:
+        self.__tasks: dict[Hashable, asyncio.Task] = {}
+        self.__calls: int = 0
+        self.__coalesced: int = 0
+
+    def start(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> asyncio.Task:
+        self.__calls += 1
+        task: asyncio.Task | None = self.__tasks.get(key)
+        if task is not None:
+            self.__coalesced += 1
+            return task
+
+        task = asyncio.ensure_future(func())
+        self.__tasks[key] = task
+        task.add_done_callback(lambda done: self.__on_done(key, done))
+        return task
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        return await asyncio.shield(self.start(key, func))
+
+    def __on_done(self, key: Hashable, task: asyncio.Task) -> None:
+        if self.__tasks.get(key) is task:
+            del self.__tasks[key]
+        # Помечаем исключение полученным, даже если все ожидающие уже отменены
+        if not task.cancelled():
+            task.exception()
+
+    def get_stats(self) -> dict:
+        return {
+            "in_flight": len(self.__tasks),
+            "calls": self.__calls,
+            "coalesced": self.__coalesced,
+        }
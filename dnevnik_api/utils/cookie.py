@@ -1,60 +1,178 @@
+import asyncio
+import heapq
 import json
+import time
+from abc import ABC, abstractmethod
+from contextlib import suppress
 from typing import Any
-import threading
 from pathlib import Path
 import logging
 
 logger: logging.Logger = logging.getLogger(__name__)
 
 
-class Cookie:
-    def __init__(self, cookie_path: Path, delete_interval: float = 300.0) -> None:
+class AbstractCookieBackend(ABC):
+    # Бэкенд выполняет блокирующий ввод-вывод и вызывается через executor
+    blocking: bool = False
+
+    @abstractmethod
+    def save(self, name: str, cookies: list[dict[str, Any]]) -> None:
+        pass
+
+    @abstractmethod
+    def load(self, name: str) -> list[dict[str, Any]] | None:
+        pass
+
+    @abstractmethod
+    def delete(self, name: str) -> None:
+        pass
+
+
+class MemoryCookieBackend(AbstractCookieBackend):
+    def __init__(self) -> None:
+        self.__cookies: dict[str, list[dict[str, Any]]] = {}
+
+    def save(self, name: str, cookies: list[dict[str, Any]]) -> None:
+        self.__cookies[name] = cookies
+
+    def load(self, name: str) -> list[dict[str, Any]] | None:
+        return self.__cookies.get(name)
+
+    def delete(self, name: str) -> None:
+        self.__cookies.pop(name, None)
+
+
+class FileCookieBackend(AbstractCookieBackend):
+    """Куки в отдельных файлах ``cookies_<name>.json`` внутри ``cookie_path``.
+
+    Другие файлы каталога не трогаются, даже если каталог указан неверно или общий.
+    """
+
+    blocking: bool = True
+    FILE_PREFIX: str = "cookies_"
+    FILE_SUFFIX: str = ".json"
+
+    def __init__(self, cookie_path: Path) -> None:
         self.__cookie_path: Path = cookie_path
+        self.__cookie_path.mkdir(parents=True, exist_ok=True)
+        # Сроки жизни не переживают перезапуск, поэтому оставшиеся файлы уже не будут прочитаны
+        for stale_file in self.__cookie_path.glob(f"{self.FILE_PREFIX}*{self.FILE_SUFFIX}"):
+            if stale_file.is_file():
+                stale_file.unlink()
+
+    def __file_path(self, name: str) -> Path:
+        return self.__cookie_path / f"{self.FILE_PREFIX}{name}{self.FILE_SUFFIX}"
+
+    def save(self, name: str, cookies: list[dict[str, Any]]) -> None:
+        with open(self.__file_path(name), "w", encoding="utf-8") as file:
+            json.dump(cookies, file, separators=(",", ":"), ensure_ascii=False)
+
+    def load(self, name: str) -> list[dict[str, Any]] | None:
+        file_path: Path = self.__file_path(name)
+        if not file_path.exists():
+            return None
+        with open(file_path, "r", encoding="utf-8") as file:
+            return json.load(file)
+
+    def delete(self, name: str) -> None:
+        self.__file_path(name).unlink(missing_ok=True)
+
+
+class Cookie:
+    """Хранилище кук с истечением срока жизни.
+
+    Все записи удаляются одной задачей asyncio, которая спит до ближайшего срока из кучи.
+    """
+
+    def __init__(self, backend: AbstractCookieBackend, delete_interval: float = 300.0) -> None:
+        self.__backend: AbstractCookieBackend = backend
         self.__delete_interval: float = delete_interval
+        self.__expiry: dict[str, float] = {}
+        self.__heap: list[tuple[float, str]] = []
+        self.__wakeup: asyncio.Event = asyncio.Event()
+        self.__sweeper: asyncio.Task | None = None
+        self.__saved: int = 0
+        self.__expired: int = 0
 
-    def __delete_cookie_file(self, file_path) -> None:
+    async def __run(self, func, *args):
+        if self.__backend.blocking:
+            return await asyncio.get_event_loop().run_in_executor(None, func, *args)
+        return func(*args)
+
+    async def __delete(self, name: str) -> None:
+        self.__expiry.pop(name, None)
         try:
-            if file_path.exists():
-                file_path.unlink()
-                logger.info(
-                    f"Cookie file {file_path} automatically deleted after {self.__delete_interval // 60} minutes"
-                )
+            await self.__run(self.__backend.delete, name)
+            self.__expired += 1
+            logger.info("Cookies %s automatically deleted after %s minutes", name, self.__delete_interval // 60)
         except Exception as e:
-            logger.error(f"Error deleting cookie file {file_path}: {e}")
+            logger.error("Error deleting cookies %s: %s", name, e)
 
-    def save_cookies(self, cookies: list[dict[str, Any]], name: str) -> bool:
-        try:
-            file_path: Path = Path(self.__cookie_path) / name
-            file_path.parent.mkdir(parents=True, exist_ok=True)
+    async def __sweep(self) -> None:
+        while True:
+            if not self.__heap:
+                self.__wakeup.clear()
+                await self.__wakeup.wait()
+                continue
 
-            with open(file_path, "w", encoding="utf-8") as file:
-                json.dump(cookies, file, indent=2, ensure_ascii=False)
+            expires_at, name = self.__heap[0]
+            delay: float = expires_at - time.monotonic()
+            if delay > 0:
+                self.__wakeup.clear()
+                with suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(self.__wakeup.wait(), delay)
+                continue
 
-            logger.info(f"Cookies saved to {file_path}")
+            heapq.heappop(self.__heap)
+            # Запись в куче устарела, если куки были пересохранены позже
+            if self.__expiry.get(name) == expires_at:
+                await self.__delete(name)
 
-            timer = threading.Timer(self.__delete_interval, self.__delete_cookie_file, [file_path])
-            timer.start()
+    async def start(self) -> None:
+        self.__sweeper = asyncio.create_task(self.__sweep())
 
-            return True
+    async def close(self) -> None:
+        if self.__sweeper is not None:
+            self.__sweeper.cancel()
+            with suppress(asyncio.CancelledError):
+                await self.__sweeper
 
+    async def save_cookies(self, cookies: list[dict[str, Any]], name: str) -> bool:
+        try:
+            await self.__run(self.__backend.save, name, cookies)
         except Exception as e:
-            logger.error(f"Error saving cookies to {file_path}: {e}")
+            logger.error("Error saving cookies %s: %s", name, e)
             return False
 
-    def load_cookies(self, name: str) -> list[dict[str, Any]]:
-        try:
-            file_path: Path = Path(self.__cookie_path) / name
-
-            if not file_path.exists():
-                logger.warning(f"Cookies file not found: {file_path}")
-                return []
-
-            with open(file_path, "r", encoding="utf-8") as file:
-                cookies = json.load(file)
-
-            logger.info(f"Cookies loaded from {file_path}")
-            return cookies
+        expires_at: float = time.monotonic() + self.__delete_interval
+        self.__expiry[name] = expires_at
+        heapq.heappush(self.__heap, (expires_at, name))
+        if self.__heap[0][1] == name:
+            self.__wakeup.set()
+        self.__saved += 1
+        logger.info("Cookies %s saved", name)
+        return True
 
+    async def load_cookies(self, name: str) -> list[dict[str, Any]]:
+        expires_at: float | None = self.__expiry.get(name)
+        if expires_at is None or expires_at <= time.monotonic():
+            logger.warning("Cookies not found: %s", name)
+            return []
+        try:
+            cookies: list[dict[str, Any]] | None = await self.__run(self.__backend.load, name)
         except Exception as e:
-            logger.error(f"Error loading cookies from {file_path}: {e}")
+            logger.error("Error loading cookies %s: %s", name, e)
+            return []
+
+        if cookies is None:
+            logger.warning("Cookies not found: %s", name)
             return []
+        logger.info("Cookies %s loaded", name)
+        return cookies
+
+    def get_stats(self) -> dict:
+        return {
+            "live": len(self.__expiry),
+            "saved": self.__saved,
+            "expired": self.__expired,
+        }
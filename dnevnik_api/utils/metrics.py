@@ -0,0 +1,178 @@
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Callable, Iterator
+
+from utils.tracing import span
+
+Labels = tuple[str, ...]
+
+DEFAULT_BUCKETS: tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Labels, values: Labels, extra: str = "") -> str:
+    pairs: list[str] = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Metric:
+    """Метрика в текстовом формате Prometheus с произвольным набором меток."""
+
+    type: str = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Labels = ()) -> None:
+        self.name: str = name
+        self.documentation: str = documentation
+        self.labelnames: Labels = labelnames
+        REGISTRY.register(self)
+
+    def _key(self, labels: dict[str, str]) -> Labels:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines: list[str] = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    type: str = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Labels = ()) -> None:
+        self.__values: dict[Labels, float] = {}
+        super().__init__(name, documentation, labelnames)
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key: Labels = self._key(labels)
+        self.__values[key] = self.__values.get(key, 0.0) + amount
+
+    def _samples(self) -> Iterator[str]:
+        for key, value in self.__values.items():
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {value}"
+
+
+class Gauge(Metric):
+    type: str = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Labels = ()) -> None:
+        self.__values: dict[Labels, float] = {}
+        super().__init__(name, documentation, labelnames)
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key: Labels = self._key(labels)
+        self.__values[key] = self.__values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        self.__values[self._key(labels)] = value
+
+    def _samples(self) -> Iterator[str]:
+        for key, value in self.__values.items():
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {value}"
+
+
+class Histogram(Metric):
+    type: str = "histogram"
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Labels = (), buckets: tuple[float, ...] = DEFAULT_BUCKETS
+    ) -> None:
+        self.__buckets: tuple[float, ...] = buckets
+        # Для каждой комбинации меток: счётчики по корзинам, сумма и количество
+        self.__values: dict[Labels, tuple[list[int], list[float]]] = {}
+        super().__init__(name, documentation, labelnames)
+
+    def observe(self, value: float, **labels: str) -> None:
+        key: Labels = self._key(labels)
+        entry: tuple[list[int], list[float]] | None = self.__values.get(key)
+        if entry is None:
+            entry = ([0] * len(self.__buckets), [0.0, 0.0])
+            self.__values[key] = entry
+        counts, totals = entry
+        for index, bound in enumerate(self.__buckets):
+            if value <= bound:
+                counts[index] += 1
+                break
+        totals[0] += value
+        totals[1] += 1
+
+    def _samples(self) -> Iterator[str]:
+        for key, (counts, (total, count)) in self.__values.items():
+            cumulative: int = 0
+            for bound, bucket_count in zip(self.__buckets, counts):
+                cumulative += bucket_count
+                le: str = f'le="{bound}"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}"
+            le = 'le="+Inf"'
+            yield f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {int(count)}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, key)} {total}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, key)} {int(count)}"
+
+
+class Registry:
+    def __init__(self) -> None:
+        self.__metrics: dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> None:
+        self.__metrics[metric.name] = metric
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self.__metrics.values()) + "\n"
+
+
+REGISTRY: Registry = Registry()
+
+
+class Instrument:
+    """Длительность, число выполняющихся операций и ошибки для одного вида операций.
+
+    Создаёт метрики ``<prefix>_duration_seconds``, ``<prefix>_in_flight`` и ``<prefix>_errors_total``,
+    каждая операция также становится спаном ``<prefix>.<метки>`` в трассировке запроса.
+    """
+
+    def __init__(self, prefix: str, documentation: str, labelnames: Labels) -> None:
+        self.__prefix: str = prefix
+        self.__labelnames: Labels = labelnames
+        self.duration: Histogram = Histogram(f"{prefix}_duration_seconds", f"{documentation}, длительность", labelnames)
+        self.in_flight: Gauge = Gauge(f"{prefix}_in_flight", f"{documentation}, выполняются сейчас", labelnames)
+        self.errors: Counter = Counter(f"{prefix}_errors_total", f"{documentation}, ошибки", labelnames)
+
+    @contextmanager
+    def track(self, **labels: str) -> Iterator[None]:
+        """Замеряет операцию и записывает её спаном текущей трассировки."""
+        self.in_flight.inc(**labels)
+        started: float = time.perf_counter()
+        try:
+            with span(".".join((self.__prefix, *(str(labels.get(name, "")) for name in self.__labelnames)))):
+                yield
+        except Exception:
+            self.errors.inc(**labels)
+            raise
+        finally:
+            self.duration.observe(time.perf_counter() - started, **labels)
+            self.in_flight.dec(**labels)
+
+    def wrap(self, *values: str) -> Callable:
+        """Декоратор асинхронной функции, значения меток передаются в порядке ``labelnames``."""
+        labels: dict[str, str] = dict(zip(self.__labelnames, values))
+
+        def decorator(func: Callable) -> Callable:
+            @wraps(func)
+            async def wrapper(*args, **kwargs):
+                with self.track(**labels):
+                    return await func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
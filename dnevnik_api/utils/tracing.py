@@ -0,0 +1,131 @@
+import json
+import re
+import secrets
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import IO, Iterator
+
+TRACEPARENT_HEADER: str = "traceparent"
+
+_TRACEPARENT_PATTERN: re.Pattern = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+_NOT_TOKEN_PATTERN: re.Pattern = re.compile(r"[^A-Za-z0-9!#$%&'*+\-.^_`|~]")
+
+
+@dataclass
+class Trace:
+    trace_id: str
+    # Длительности завершённых спанов запроса для заголовка Server-Timing
+    spans: list[tuple[str, float]] = field(default_factory=list)
+
+
+_trace: ContextVar[Trace | None] = ContextVar("trace", default=None)
+_span_id: ContextVar[str | None] = ContextVar("span_id", default=None)
+
+
+class SpanWriter:
+    """Запись спанов в файл JSON Lines для последующего построения водопадов запросов."""
+
+    FLUSH_INTERVAL: float = 1.0
+
+    def __init__(self, service: str, path: str | None = None) -> None:
+        self.__service: str = service
+        self.__file: IO[str] | None = open(path, "a", encoding="utf-8", buffering=1 << 16) if path else None
+        self.__flushed_at: float = time.monotonic()
+
+    def write(self, record: dict) -> None:
+        if self.__file is None:
+            return
+        record["service"] = self.__service
+        self.__file.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+        if time.monotonic() - self.__flushed_at >= self.FLUSH_INTERVAL:
+            self.__file.flush()
+            self.__flushed_at = time.monotonic()
+
+    def close(self) -> None:
+        if self.__file is not None:
+            self.__file.close()
+            self.__file = None
+
+
+_writer: SpanWriter = SpanWriter("")
+
+
+def configure(service: str, path: str | None) -> None:
+    """Задаёт имя сервиса и файл, в который пишутся спаны; без файла спаны только попадают в Server-Timing."""
+    global _writer
+    _writer.close()
+    _writer = SpanWriter(service, path)
+
+
+def close() -> None:
+    _writer.close()
+
+
+@contextmanager
+def trace_context(traceparent: str | None = None) -> Iterator[Trace]:
+    """Открывает трассировку запроса, продолжая переданную в заголовке ``traceparent`` или начиная новую."""
+    match: re.Match | None = _TRACEPARENT_PATTERN.match(traceparent or "")
+    trace: Trace = Trace(match.group(1) if match else secrets.token_hex(16))
+    trace_token = _trace.set(trace)
+    span_token = _span_id.set(match.group(2) if match else None)
+    try:
+        yield trace
+    finally:
+        _span_id.reset(span_token)
+        _trace.reset(trace_token)
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Замеряет участок кода внутри текущей трассировки; вне трассировки ничего не делает."""
+    trace: Trace | None = _trace.get()
+    if trace is None:
+        yield
+        return
+
+    span_id: str = secrets.token_hex(8)
+    parent_id: str | None = _span_id.get()
+    token = _span_id.set(span_id)
+    started_at: float = time.time()
+    started: float = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration: float = time.perf_counter() - started
+        _span_id.reset(token)
+        trace.spans.append((name, duration))
+        _writer.write(
+            {
+                "trace_id": trace.trace_id,
+                "span_id": span_id,
+                "parent_id": parent_id,
+                "name": name,
+                "start": started_at,
+                "duration": duration,
+            }
+        )
+
+
+def get_trace_id() -> str | None:
+    trace: Trace | None = _trace.get()
+    return trace.trace_id if trace is not None else None
+
+
+def get_traceparent() -> str | None:
+    """Заголовок ``traceparent`` для исходящего запроса из текущего спана."""
+    trace: Trace | None = _trace.get()
+    span_id: str | None = _span_id.get()
+    if trace is None or span_id is None:
+        return None
+    return f"00-{trace.trace_id}-{span_id}-01"
+
+
+def get_server_timing(trace: Trace) -> str:
+    """Значение заголовка Server-Timing: суммарная длительность спанов с одинаковым именем в миллисекундах."""
+    totals: dict[str, float] = {}
+    for name, duration in trace.spans:
+        metric: str = _NOT_TOKEN_PATTERN.sub("_", name)
+        totals[metric] = totals.get(metric, 0.0) + duration
+    return ", ".join(f"{name};dur={duration * 1000:.1f}" for name, duration in totals.items())
@@ -5,39 +5,112 @@
 import asyncio
 
 from utils.logger import Logger
-from filters.is_admin import IsAdmin
-from models.admin_data import AdminData
+from utils import tracing
 from src.bot import AbstractTgBot, TgBot
-from src.api import AdminApi, LoginApi, DnevnikApi
+from src.api import AdminApi, LoginApi, DnevnikApi, StatusApi, EventsApi
 from services.admin_service import AdminService
 from services.login_service import LoginService
 from services.user_service import UserService
+from services.notification_service import NotificationService
 from src.template_engine import AbstractTemplateEngine, TemplateEngine
+from src.send_scheduler import SendScheduler
+from src.webhook import WebhookSettings
+from src.fsm_storage import SqliteStorage
+from src.metrics import MetricsServer
+import config
 from config import CONTROLLER_IP, LOGGING_LEVEL, TIMEOUT, TEMPLATES_PATH, BOT_TOKEN
 
 
+# Настройки, добавленные после первого выпуска, необязательны: если их нет в config.py, берутся значения по умолчанию
+TEMPLATES_CACHE_PATH: str | None = getattr(config, "TEMPLATES_CACHE_PATH", None)
+ADMINS_REFRESH_INTERVAL: float = getattr(config, "ADMINS_REFRESH_INTERVAL", 300.0)
+SEND_GLOBAL_RATE: float = getattr(config, "SEND_GLOBAL_RATE", SendScheduler.DEFAULT_GLOBAL_RATE)
+SEND_CHAT_RATE: float = getattr(config, "SEND_CHAT_RATE", SendScheduler.DEFAULT_CHAT_RATE)
+SEND_CHAT_BURST: float = getattr(config, "SEND_CHAT_BURST", SendScheduler.DEFAULT_CHAT_BURST)
+# "polling" или "webhook"; WEBHOOK_URL и WEBHOOK_SECRET нужны только для вебхука
+BOT_MODE: str = getattr(config, "BOT_MODE", "polling")
+WEBHOOK_PATH: str = getattr(config, "WEBHOOK_PATH", WebhookSettings.path)
+WEBHOOK_HOST: str = getattr(config, "WEBHOOK_HOST", WebhookSettings.host)
+WEBHOOK_PORT: int = getattr(config, "WEBHOOK_PORT", WebhookSettings.port)
+WEBHOOK_MAX_CONCURRENCY: int = getattr(config, "WEBHOOK_MAX_CONCURRENCY", WebhookSettings.max_concurrency)
+WEBHOOK_DRAIN_TIMEOUT: float = getattr(config, "WEBHOOK_DRAIN_TIMEOUT", WebhookSettings.drain_timeout)
+NOTIFICATIONS_ENABLED: bool = getattr(config, "NOTIFICATIONS_ENABLED", True)
+FSM_DB_PATH: str = getattr(config, "FSM_DB_PATH", "fsm.sqlite3")
+FSM_TTL: float = getattr(config, "FSM_TTL", SqliteStorage.DEFAULT_TTL)
+FSM_MAX_ENTRIES: int = getattr(config, "FSM_MAX_ENTRIES", SqliteStorage.DEFAULT_MAX_ENTRIES)
+FSM_FLUSH_INTERVAL: float = getattr(config, "FSM_FLUSH_INTERVAL", SqliteStorage.DEFAULT_FLUSH_INTERVAL)
+METRICS_HOST: str = getattr(config, "METRICS_HOST", "127.0.0.1")
+METRICS_PORT: int = getattr(config, "METRICS_PORT", 9100)
+LOG_PATH: str = getattr(config, "LOG_PATH", "app.log")
+LOG_MAX_BYTES: int = getattr(config, "LOG_MAX_BYTES", 10 * 1024 * 1024)
+LOG_BACKUP_COUNT: int = getattr(config, "LOG_BACKUP_COUNT", 5)
+LOG_ROTATE_WHEN: str | None = getattr(config, "LOG_ROTATE_WHEN", None)
+LOG_JSON: bool = getattr(config, "LOG_JSON", False)
+LOG_SAMPLE_INTERVAL: float = getattr(config, "LOG_SAMPLE_INTERVAL", 0.0)
+TRACE_PATH: str | None = getattr(config, "TRACE_PATH", None)
+
+
 async def main() -> None:
-    Logger(level=LOGGING_LEVEL)
+    Logger(
+        LOGGING_LEVEL,
+        path=LOG_PATH,
+        max_bytes=LOG_MAX_BYTES,
+        backup_count=LOG_BACKUP_COUNT,
+        when=LOG_ROTATE_WHEN,
+        json_format=LOG_JSON,
+        sample_interval=LOG_SAMPLE_INTERVAL,
+    )
+    tracing.configure("tg_bot", TRACE_PATH)
 
     admin_api: AdminApi = AdminApi(CONTROLLER_IP, TIMEOUT)
     login_api: LoginApi = LoginApi(CONTROLLER_IP, TIMEOUT)
     dnevnik_api: DnevnikApi = DnevnikApi(CONTROLLER_IP, TIMEOUT)
-
-    await admin_api.new_admin(AdminData(tg_id=1170348812))
-
-    # filter: IsAdmin = IsAdmin()
-    # for admin in await api.get_admins():
-    #     await filter.add_admin(admin.tg_id)
+    status_api: StatusApi = StatusApi(CONTROLLER_IP, TIMEOUT)
+    events_api: EventsApi = EventsApi(CONTROLLER_IP, TIMEOUT)
 
     admin_service = AdminService(admin_api)
+    await admin_service.add_admin(1170348812)
     login_service = LoginService(login_api)
-    user_service = UserService(dnevnik_api)
+    user_service = UserService(dnevnik_api, status_api)
+    notification_service = NotificationService(events_api) if NOTIFICATIONS_ENABLED else None
 
-    template_engine: AbstractTemplateEngine = TemplateEngine(TEMPLATES_PATH)
+    send_scheduler: SendScheduler = SendScheduler(SEND_GLOBAL_RATE, SEND_CHAT_RATE, SEND_CHAT_BURST)
+    webhook: WebhookSettings | None = None
+    if BOT_MODE == "webhook":
+        webhook = WebhookSettings(
+            url=config.WEBHOOK_URL,
+            secret_token=config.WEBHOOK_SECRET,
+            path=WEBHOOK_PATH,
+            host=WEBHOOK_HOST,
+            port=WEBHOOK_PORT,
+            max_concurrency=WEBHOOK_MAX_CONCURRENCY,
+            drain_timeout=WEBHOOK_DRAIN_TIMEOUT,
+        )
+    # Несколько реплик в режиме вебхука делят один файл и не доверяют памяти
+    fsm_storage: SqliteStorage = SqliteStorage(
+        FSM_DB_PATH, FSM_TTL, FSM_MAX_ENTRIES, FSM_FLUSH_INTERVAL, shared=BOT_MODE == "webhook"
+    )
+    metrics_server: MetricsServer = MetricsServer(METRICS_HOST, METRICS_PORT)
+    template_engine: AbstractTemplateEngine = TemplateEngine(TEMPLATES_PATH, TEMPLATES_CACHE_PATH)
 
-    bot: AbstractTgBot = TgBot(BOT_TOKEN, template_engine, admin_service, login_service, user_service)
+    bot: AbstractTgBot = TgBot(
+        BOT_TOKEN,
+        template_engine,
+        admin_service,
+        login_service,
+        user_service,
+        notification_service,
+        ADMINS_REFRESH_INTERVAL,
+        send_scheduler,
+        webhook,
+        fsm_storage,
+        metrics_server,
+    )
 
-    await bot.run()
+    try:
+        await bot.run()
+    finally:
+        tracing.close()
 
 
 if __name__ == "__main__":
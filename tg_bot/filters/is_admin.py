@@ -1,24 +1,27 @@
-from typing import Self, Optional
-from aiogram.types import Message
+from typing import Self, Optional, Iterable
+from aiogram.types import Message, CallbackQuery
 from aiogram.filters import Filter
 
 
 class IsAdmin(Filter):
     _instance: Optional[Self] = None
-    __admins: list[int] = []
+    __admins: set[int] = set()
 
     def __new__(cls) -> Self:
         if cls._instance is None:
             cls._instance = super().__new__(cls)
         return cls._instance
 
-    async def __call__(self, message: Message) -> bool:
-        return message.chat.id in self.__admins
+    async def __call__(self, event: Message | CallbackQuery) -> bool:
+        if isinstance(event, CallbackQuery):
+            return event.from_user.id in IsAdmin.__admins
+        return event.chat.id in IsAdmin.__admins
+
+    async def set_admins(self, admin_ids: Iterable[int]) -> None:
+        IsAdmin.__admins = set(admin_ids)
 
     async def add_admin(self, admin_id: int) -> None:
-        if admin_id not in self.__admins:
-            self.__admins.append(admin_id)
+        IsAdmin.__admins.add(admin_id)
 
     async def del_admin(self, admin_id: int) -> None:
-        if admin_id in self.__admins:
-            self.__admins.remove(admin_id)
+        IsAdmin.__admins.discard(admin_id)
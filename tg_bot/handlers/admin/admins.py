@@ -30,6 +30,7 @@ class AdminAdminsHandler(AbstractHandler):
 
     async def __register_handlers(self) -> None:
         self.__router.message.filter(ChatTypeFilter("private"), IsAdmin())
+        self.__router.callback_query.filter(IsAdmin())
 
         self.__router.message.register(self.__get_admins, F.text == "Все админы")
         self.__router.message.register(self.__add_admin_by_id, F.text == "Добавить админа")
@@ -1,16 +1,29 @@
+from collections import OrderedDict
+from contextlib import suppress
+from datetime import date
 from aiogram import Router, F
-from aiogram.types import Message, BotCommand
+from aiogram.types import Message, BotCommand, CallbackQuery
+from aiogram.exceptions import TelegramBadRequest
 
 from handlers.abstract_handler import AbstractHandler
 from src.template_engine import AbstractTemplateEngine
 
+from keyboards.inline.week_schedule import WeekScheduleKeyboard
+
 from services.user_service import UserService
+from services.message_service import MessageService
 
 
 class DnevnikHandler(AbstractHandler):
+    # Сколько последних сообщений с расписанием можно листать без повторного запроса
+    MAX_SCHEDULE_PAGES: int = 1000
+
     def __init__(self, template_engine: AbstractTemplateEngine, user_service: UserService) -> None:
         self.__template_engine: AbstractTemplateEngine = template_engine
         self.__user_service: UserService = user_service
+        self.__message_service: MessageService = MessageService()
+        self.__week_schedule_keyboard: WeekScheduleKeyboard = WeekScheduleKeyboard()
+        self.__schedule_pages: OrderedDict[tuple[int, int], list[str]] = OrderedDict()
 
         self.__router = Router()
 
@@ -23,13 +36,22 @@ class DnevnikHandler(AbstractHandler):
         self.__router.message.register(self.__get_summary_marks, F.text == "Сводка оценок")
         self.__router.message.register(self.__get_week_schedule, F.text == "Расписание на неделю")
         self.__router.message.register(self.__get_school_info, F.text == "Информация о школе")
+        self.__router.callback_query.register(
+            self.__callback_week_day, F.data.startswith(WeekScheduleKeyboard.CALLBACK_PREFIX)
+        )
 
     async def get_commands(self) -> list[BotCommand]:
         return []
 
+    async def __send_unavailable(self, message: Message) -> None:
+        if await self.__user_service.is_degraded():
+            text: str = await self.__template_engine.render("user/service_degraded.tfb")
+            await message.answer(text)
+
     async def __get_person_data(self, message: Message) -> None:
         data: dict | None = await self.__user_service.get_person_data(message.chat.id)
         if data is None:
+            await self.__send_unavailable(message)
             return
         text: str = await self.__template_engine.render("user/person_data.tfb", data=data)
         await message.answer(text, parse_mode="html")
@@ -37,22 +59,64 @@ class DnevnikHandler(AbstractHandler):
     async def __get_summary_marks(self, message: Message) -> None:
         data: dict | None = await self.__user_service.get_summary_marks(message.chat.id)
         if data is None:
+            await self.__send_unavailable(message)
             return
         text: str = await self.__template_engine.render("user/summary_marks.tfb", data=data)
         await message.answer(text, parse_mode="html")
 
+    async def __render_week_schedule(self, tg_id: int) -> list[str] | None:
+        data: dict | None = await self.__user_service.get_week_schedule(tg_id)
+        if data is None or not data.get("days"):
+            return None
+        return [await self.__template_engine.render("user/week_schedule.tfb", data=day) for day in data["days"]]
+
+    def __remember_pages(self, key: tuple[int, int], pages: list[str]) -> None:
+        self.__schedule_pages[key] = pages
+        self.__schedule_pages.move_to_end(key)
+        while len(self.__schedule_pages) > self.MAX_SCHEDULE_PAGES:
+            self.__schedule_pages.popitem(last=False)
+
     async def __get_week_schedule(self, message: Message) -> None:
-        data: dict | None = await self.__user_service.get_week_schedule(message.chat.id)
-        if data is None:
+        pages: list[str] | None = await self.__render_week_schedule(message.chat.id)
+        if pages is None:
+            await self.__send_unavailable(message)
+            return
+        day_index: int = min(date.today().weekday(), len(pages) - 1)
+        keyboard = await self.__week_schedule_keyboard.get_keyboard(day_index, len(pages))
+        sent: Message = await message.answer(pages[day_index], parse_mode="html", reply_markup=keyboard)
+        self.__remember_pages((sent.chat.id, sent.message_id), pages)
+
+    async def __callback_week_day(self, callback: CallbackQuery) -> None:
+        try:
+            day_index = int(callback.data.split("_")[-1])  # type: ignore
+        except (ValueError, IndexError):
+            await callback.answer()
             return
-        for day in data["days"]:
-            text: str = await self.__template_engine.render("user/week_schedule.tfb", data=day)
-            await message.answer(text, parse_mode="html")
+        if callback.message is None:
+            await callback.answer()
+            return
+
+        key: tuple[int, int] = (callback.message.chat.id, callback.message.message_id)
+        pages: list[str] | None = self.__schedule_pages.get(key)
+        if pages is None:
+            # Страницы потеряны после перезапуска, расписание отдаст кэш контроллера
+            pages = await self.__render_week_schedule(callback.message.chat.id)
+            if pages is None:
+                await callback.answer()
+                return
+            self.__remember_pages(key, pages)
+        day_index = max(0, min(day_index, len(pages) - 1))
 
+        keyboard = await self.__week_schedule_keyboard.get_keyboard(day_index, len(pages))
+        await self.__message_service.edit_message(callback, pages[day_index], keyboard)
+        # edit_message уже отвечает на запрос, если сообщение не удалось изменить
+        with suppress(TelegramBadRequest):
+            await callback.answer()
 
     async def __get_school_info(self, message: Message) -> None:
         data: dict | None = await self.__user_service.get_school_info(message.chat.id)
         if data is None:
+            await self.__send_unavailable(message)
             return
         text: str = await self.__template_engine.render("user/school_info.tfb", data=data)
         await message.answer(text, parse_mode="html")
@@ -0,0 +1,17 @@
+from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+from keyboards.abstract_keyboard import AbstractInlineKeyboard
+
+
+class WeekScheduleKeyboard(AbstractInlineKeyboard):
+    CALLBACK_PREFIX: str = "week_day"
+
+    async def get_keyboard(self, day_index: int, days_count: int) -> InlineKeyboardMarkup:
+        buttons: list = []
+        if day_index > 0:
+            buttons.append(InlineKeyboardButton(text="<", callback_data=f"{self.CALLBACK_PREFIX}_{day_index - 1}"))
+        buttons.append(
+            InlineKeyboardButton(text=f"{day_index + 1}/{days_count}", callback_data=f"{self.CALLBACK_PREFIX}_noop")
+        )
+        if day_index < days_count - 1:
+            buttons.append(InlineKeyboardButton(text=">", callback_data=f"{self.CALLBACK_PREFIX}_{day_index + 1}"))
+        return InlineKeyboardMarkup(inline_keyboard=[buttons])
@@ -1,18 +1,40 @@
+import logging
+
 from models.admin_data import AdminData
+from filters.is_admin import IsAdmin
 from src.api import AdminApi
 
 
 class AdminService:
     def __init__(self, api: AdminApi) -> None:
         self.__api: AdminApi = api
+        self.__filter: IsAdmin = IsAdmin()
 
     async def get_admins(self) -> list[AdminData]:
-        return await self.__api.get_admins()
+        return await self.__api.get_admins() or []
+
+    async def load_admins(self) -> bool:
+        """Обновляет фильтр администраторов списком из контроллера.
+
+        При ошибке запроса фильтр не меняется, чтобы не потерять известных администраторов.
+        """
+        admins: list[AdminData] | None = await self.__api.get_admins()
+        if admins is None:
+            logging.warning("Не удалось загрузить список администраторов")
+            return False
+        await self.__filter.set_admins(admin.tg_id for admin in admins)
+        return True
 
     async def add_admin(self, tg_id: int) -> bool:
         user_data = AdminData(tg_id=tg_id)
-        return await self.__api.new_admin(user_data)
+        success: bool = await self.__api.new_admin(user_data)
+        if success:
+            await self.__filter.add_admin(tg_id)
+        return success
 
     async def delete_admin(self, tg_id: int) -> bool:
         user_data = AdminData(tg_id=tg_id)
-        return await self.__api.del_admin(user_data)
+        success: bool = await self.__api.del_admin(user_data)
+        if success:
+            await self.__filter.del_admin(tg_id)
+        return success
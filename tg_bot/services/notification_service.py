@@ -0,0 +1,21 @@
+from src.api import EventsApi
+
+
+class NotificationService:
+    DEFAULT_WAIT: float = 25.0
+
+    def __init__(self, api: EventsApi, wait: float = DEFAULT_WAIT) -> None:
+        self.__api: EventsApi = api
+        self.__wait: float = wait
+        # Неизвестен до первого опроса: после перезапуска бота уже отправленные события не повторяются
+        self.__last_seq: int | None = None
+
+    async def get_mark_events(self) -> list[dict] | None:
+        if self.__last_seq is None:
+            self.__last_seq = await self.__api.get_last_seq()
+            if self.__last_seq is None:
+                return None
+        events: list[dict] | None = await self.__api.get_mark_events(self.__last_seq, self.__wait)
+        if events:
+            self.__last_seq = events[-1]["seq"]
+        return events
@@ -1,10 +1,15 @@
 from models.user_data import UserData
-from src.api import DnevnikApi
+from models.bundle_data import BundleData
+from src.api import DnevnikApi, StatusApi
 
 
 class UserService:
-    def __init__(self, api: DnevnikApi) -> None:
+    def __init__(self, api: DnevnikApi, status_api: StatusApi) -> None:
         self.__api: DnevnikApi = api
+        self.__status_api: StatusApi = status_api
+
+    async def is_degraded(self) -> bool:
+        return await self.__status_api.is_degraded()
 
     async def get_person_data(self, tg_id: int) -> dict | None:
         data = UserData(id=tg_id)
@@ -25,3 +30,7 @@ class UserService:
     async def get_school_info(self, tg_id: int) -> dict | None:
         data = UserData(id=tg_id)
         return await self.__api.get_school_info(data)
+
+    async def get_bundle(self, tg_id: int, datasets: list[str]) -> dict | None:
+        data = BundleData(id=tg_id, datasets=datasets)
+        return await self.__api.get_bundle(data)
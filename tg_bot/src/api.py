@@ -1,12 +1,17 @@
 import logging
 import abc
-from json import decoder
 from typing import Any
 import httpx
+import orjson
 from pydantic import BaseModel
 
 from models.user_data import UserData
+from models.bundle_data import BundleData
 from models.admin_data import AdminData
+from utils.metrics import Instrument
+from utils.tracing import TRACEPARENT_HEADER, get_traceparent, span
+
+CONTROLLER_REQUESTS: Instrument = Instrument("controller_request", "Запросы к контроллеру", ("path",))
 
 
 class AbstractApi(abc.ABC):
@@ -20,22 +25,36 @@ class BaseApi(AbstractApi):
         self.__api_ip: str = api_ip.rstrip("/")
         self.__timeout: float = timeout
 
-    async def _get_data(self, path: str, data: BaseModel | None = None) -> Any | None:
+    async def _get_data(
+        self, path: str, data: BaseModel | None = None, params: dict | None = None, timeout: float | None = None
+    ) -> Any | None:
+        timeout = timeout or self.__timeout
         try:
-            async with httpx.AsyncClient() as client:
-                if data:
-                    response: httpx.Response = await client.post(
-                        f"{self.__api_ip}/{path}", json=data.model_dump(), timeout=self.__timeout
-                    )
-                else:
-                    response: httpx.Response = await client.get(f"{self.__api_ip}/{path}", timeout=self.__timeout)
-            response.raise_for_status()
+            with CONTROLLER_REQUESTS.track(path=path):
+                traceparent: str | None = get_traceparent()
+                headers: dict[str, str] = {TRACEPARENT_HEADER: traceparent} if traceparent else {}
+                async with httpx.AsyncClient() as client:
+                    if data:
+                        headers["Content-Type"] = "application/json"
+                        response: httpx.Response = await client.post(
+                            f"{self.__api_ip}/{path}",
+                            content=data.model_dump_json(),
+                            params=params,
+                            timeout=timeout,
+                            headers=headers,
+                        )
+                    else:
+                        response: httpx.Response = await client.get(
+                            f"{self.__api_ip}/{path}", params=params, timeout=timeout, headers=headers
+                        )
+                response.raise_for_status()
         except (httpx.HTTPStatusError, httpx.ConnectTimeout, httpx.ReadTimeout, httpx.RequestError) as exc:
             logging.warning("Ошибка запроса к %s: %s", path, exc)
             return None
         try:
-            return response.json()
-        except decoder.JSONDecodeError:
+            with span("json_decode"):
+                return orjson.loads(response.content)
+        except orjson.JSONDecodeError:
             return None
 
 
@@ -48,6 +67,7 @@ class DnevnikApi(BaseApi):
         "get_school_info": "dnevnik/get_school_info",
         "get_homework_from_range": "dnevnik/get_homework_from_range",
         "get_missed_lessons": "dnevnik/get_missed_lessons",
+        "bundle": "dnevnik/bundle",
     }
 
     async def get_person_data(self, data: UserData) -> dict | None:
@@ -78,6 +98,10 @@ class DnevnikApi(BaseApi):
         path: str = self.PATHS["get_missed_lessons"]
         return await self._get_data(path, data)
 
+    async def get_bundle(self, data: BundleData) -> dict | None:
+        path: str = self.PATHS["bundle"]
+        return await self._get_data(path, data)
+
 
 class LoginApi(BaseApi):
     PATHS: dict = {
@@ -101,10 +125,10 @@ class AdminApi(BaseApi):
         "del_admin": "admin/del_admin",
     }
 
-    async def get_admins(self) -> list[AdminData]:
+    async def get_admins(self) -> list[AdminData] | None:
         admins: list | None = await self._get_data(self.PATHS["get_admins"])
         if admins is None:
-            return []
+            return None
         return [AdminData(**admin) for admin in admins]
 
     async def new_admin(self, user_data: AdminData) -> bool:
@@ -118,3 +142,31 @@ class AdminApi(BaseApi):
         if validate is None:
             validate = False
         return validate
+
+
+class StatusApi(BaseApi):
+    PATHS: dict = {
+        "get_status": "status",
+    }
+
+    async def is_degraded(self) -> bool:
+        status: dict | None = await self._get_data(self.PATHS["get_status"])
+        if status is None:
+            return True
+        return bool(status.get("degraded"))
+
+
+class EventsApi(BaseApi):
+    PATHS: dict = {
+        "get_mark_events": "events/marks",
+        "get_last_seq": "events/marks/last_seq",
+    }
+
+    async def get_last_seq(self) -> int | None:
+        """Номер последнего события на контроллере."""
+        return await self._get_data(self.PATHS["get_last_seq"])
+
+    async def get_mark_events(self, after: int, wait: float) -> list[dict] | None:
+        """Долгий опрос контроллера: возвращает события после ``after`` или пустой список через ``wait`` секунд."""
+        params: dict = {"after": after, "wait": wait}
+        return await self._get_data(self.PATHS["get_mark_events"], params=params, timeout=wait + 5.0)
@@ -1,13 +1,24 @@
+import asyncio
 import logging
 import abc
+import signal
+from contextlib import suppress
 from aiogram import Bot, Dispatcher
+from aiogram.exceptions import TelegramAPIError
 from aiogram.types import BotCommand, BotCommandScopeDefault
+from aiogram.webhook.aiohttp_server import setup_application
+from aiohttp import web
 
 from services.admin_service import AdminService
 from services.login_service import LoginService
 from services.user_service import UserService
+from services.notification_service import NotificationService
 
 from src.template_engine import AbstractTemplateEngine
+from src.send_scheduler import SendScheduler
+from src.webhook import BoundedRequestHandler, WebhookSettings
+from src.fsm_storage import SqliteStorage
+from src.metrics import HandlerMetricsMiddleware, MetricsServer
 
 from handlers.abstract_handler import AbstractHandler
 from handlers.admin.admins import AdminAdminsHandler
@@ -35,14 +46,96 @@ class TgBot(Bot, AbstractTgBot):
         admin_service: AdminService,
         login_service: LoginService,
         user_service: UserService,
+        notification_service: NotificationService | None,
+        admins_refresh_interval: float = 300.0,
+        send_scheduler: SendScheduler | None = None,
+        webhook: WebhookSettings | None = None,
+        fsm_storage: SqliteStorage | None = None,
+        metrics_server: MetricsServer | None = None,
     ) -> None:
         logging.debug("Инициализация бота")
         super().__init__(token)
-        self.__dispatcher = Dispatcher()
+        self.__fsm_storage: SqliteStorage | None = fsm_storage
+        self.__dispatcher = Dispatcher(storage=fsm_storage) if fsm_storage is not None else Dispatcher()
+        self.__dispatcher.message.middleware(HandlerMetricsMiddleware())
+        self.__dispatcher.callback_query.middleware(HandlerMetricsMiddleware())
+        self.__metrics_server: MetricsServer | None = metrics_server
         self.__template_engine: AbstractTemplateEngine = template_engine
         self.__admin_service: AdminService = admin_service
         self.__login_service: LoginService = login_service
         self.__user_service: UserService = user_service
+        # Уведомления рассылает только одна реплика, у остальных сервис не передаётся
+        self.__notification_service: NotificationService | None = notification_service
+        self.__admins_refresh_interval: float = admins_refresh_interval
+        self.__send_scheduler: SendScheduler = send_scheduler or SendScheduler()
+        self.__webhook: WebhookSettings | None = webhook
+        self.session.middleware(self.__send_scheduler)
+
+    def get_send_stats(self) -> dict:
+        return self.__send_scheduler.get_stats()
+
+    async def __refresh_admins(self) -> None:
+        """Периодически сверяет фильтр администраторов с контроллером на случай изменений извне."""
+        while True:
+            await asyncio.sleep(self.__admins_refresh_interval)
+            await self.__admin_service.load_admins()
+
+    async def __send_mark_events(self, notification_service: NotificationService) -> None:
+        """Отправляет пользователям сообщения о новых оценках, найденных контроллером."""
+        while True:
+            try:
+                events: list[dict] | None = await notification_service.get_mark_events()
+            except Exception as e:
+                logging.error("Ошибка получения событий об оценках: %s", e)
+                events = None
+            if events is None:
+                await asyncio.sleep(5)
+                continue
+            for event in events:
+                try:
+                    text: str = await self.__template_engine.render("user/new_marks.tfb", data=event)
+                    with SendScheduler.bulk():
+                        await self.send_message(event["user_id"], text, parse_mode="html")
+                except TelegramAPIError as e:
+                    logging.warning("Не удалось отправить уведомление пользователю %s: %s", event.get("user_id"), e)
+                except Exception:
+                    # Ошибка одного уведомления не должна останавливать рассылку остальных
+                    logging.exception("Ошибка отправки уведомления пользователю %s", event.get("user_id"))
+
+    async def __run_polling(self) -> None:
+        await self.delete_webhook(drop_pending_updates=True)
+        await self.__dispatcher.start_polling(self)
+
+    async def __run_webhook(self, webhook: WebhookSettings) -> None:
+        """Принимает обновления через вебхук до сигнала остановки, затем дорабатывает принятые."""
+        app: web.Application = web.Application()
+        handler: BoundedRequestHandler = BoundedRequestHandler(
+            self.__dispatcher, self, webhook.secret_token, webhook.max_concurrency
+        )
+        handler.register(app, path=webhook.path)
+        setup_application(app, self.__dispatcher, bot=self)
+
+        runner: web.AppRunner = web.AppRunner(app)
+        await runner.setup()
+        site: web.TCPSite = web.TCPSite(runner, webhook.host, webhook.port)
+        await site.start()
+        # Вебхук общий для всех реплик, поэтому при остановке он не удаляется
+        await self.set_webhook(
+            webhook.url,
+            secret_token=webhook.secret_token,
+            allowed_updates=self.__dispatcher.resolve_used_update_types(),
+        )
+
+        stop: asyncio.Event = asyncio.Event()
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        for signal_number in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signal_number, stop.set)
+        try:
+            await stop.wait()
+        finally:
+            await site.stop()
+            await handler.drain(webhook.drain_timeout)
+            await runner.cleanup()
 
     async def run(self) -> None:
         handlers: list[AbstractHandler] = [
@@ -58,11 +151,34 @@ class TgBot(Bot, AbstractTgBot):
             bot_commands.extend(await handler.get_commands())
             self.__dispatcher.include_router(await handler.get_router())
 
-        await self.set_my_commands(bot_commands, BotCommandScopeDefault())
-        await self.delete_webhook(drop_pending_updates=True)
+        await asyncio.gather(
+            self.set_my_commands(bot_commands, BotCommandScopeDefault()),
+            self.__admin_service.load_admins(),
+        )
 
+        await self.__send_scheduler.start()
+        if self.__fsm_storage is not None:
+            await self.__fsm_storage.start()
+        if self.__metrics_server is not None:
+            await self.__metrics_server.start()
         logging.info("Бот запущен")
-        await self.__dispatcher.start_polling(self)
+        tasks: list[asyncio.Task] = [asyncio.create_task(self.__refresh_admins())]
+        if self.__notification_service is not None:
+            tasks.append(asyncio.create_task(self.__send_mark_events(self.__notification_service)))
+        try:
+            if self.__webhook is None:
+                await self.__run_polling()
+            else:
+                await self.__run_webhook(self.__webhook)
+        finally:
+            for task in tasks:
+                task.cancel()
+            for task in tasks:
+                with suppress(asyncio.CancelledError):
+                    await task
+            await self.__send_scheduler.close()
+            if self.__metrics_server is not None:
+                await self.__metrics_server.close()
 
         logging.info("Бот остановлен")
         await self.__dispatcher.storage.close()
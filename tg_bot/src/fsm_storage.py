@@ -0,0 +1,209 @@
+import asyncio
+import json
+import logging
+import sqlite3
+import time
+from collections import OrderedDict
+from contextlib import suppress
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Mapping
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, KeyBuilder, StateType, StorageKey
+
+
+@dataclass
+class _Record:
+    state: str | None = None
+    data: dict[str, Any] = field(default_factory=dict)
+    updated_at: float = field(default_factory=time.time)
+
+    def is_empty(self) -> bool:
+        return self.state is None and not self.data
+
+
+class SqliteStorage(BaseStorage):
+    """Хранилище состояний FSM в SQLite с горячим слоем в памяти.
+
+    Изменения копятся в памяти и записываются одной транзакцией раз в ``flush_interval`` секунд.
+    Состояния, не менявшиеся дольше ``ttl`` секунд, считаются брошенными и удаляются.
+    В памяти держится не больше ``max_entries`` записей, сверх этого вытесняются давно не
+    использованные уже записанные на диск записи.
+
+    При ``shared=True`` файл базы используют несколько процессов бота: тогда из памяти читаются
+    только свои ещё не записанные изменения, а остальное всегда читается из базы.
+    """
+
+    DEFAULT_TTL: float = 24 * 3600.0
+    DEFAULT_MAX_ENTRIES: int = 10000
+    DEFAULT_FLUSH_INTERVAL: float = 1.0
+    DEFAULT_SWEEP_INTERVAL: float = 600.0
+
+    def __init__(
+        self,
+        path: str,
+        ttl: float = DEFAULT_TTL,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        shared: bool = False,
+        key_builder: KeyBuilder | None = None,
+    ) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.__connection: sqlite3.Connection = sqlite3.connect(path, check_same_thread=False, timeout=30.0)
+        self.__connection.execute("PRAGMA journal_mode=WAL")
+        self.__connection.execute(
+            "CREATE TABLE IF NOT EXISTS fsm (key TEXT PRIMARY KEY, state TEXT, data TEXT NOT NULL, updated_at REAL)"
+        )
+        self.__connection.execute("CREATE INDEX IF NOT EXISTS fsm_updated_at ON fsm (updated_at)")
+        self.__connection.commit()
+        # Соединение используется из пула потоков, поэтому обращения к нему идут по одному
+        self.__db_lock: asyncio.Lock = asyncio.Lock()
+
+        self.__ttl: float = ttl
+        self.__max_entries: int = max_entries
+        self.__flush_interval: float = flush_interval
+        self.__shared: bool = shared
+        self.__key_builder: KeyBuilder = key_builder or DefaultKeyBuilder(with_bot_id=True, with_destiny=True)
+        self.__records: OrderedDict[str, _Record] = OrderedDict()
+        self.__dirty: set[str] = set()
+        self.__flusher: asyncio.Task | None = None
+
+        self.__flushes: int = 0
+        self.__written: int = 0
+        self.__expired: int = 0
+
+    async def __execute(self, func, *args) -> Any:
+        async with self.__db_lock:
+            return await asyncio.to_thread(func, *args)
+
+    def __select(self, key: str) -> _Record | None:
+        row = self.__connection.execute("SELECT state, data, updated_at FROM fsm WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        return _Record(row[0], json.loads(row[1]), row[2])
+
+    def __write(self, upserts: list[tuple], deletes: list[tuple]) -> None:
+        with self.__connection:
+            self.__connection.executemany(
+                "INSERT INTO fsm (key, state, data, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET state = excluded.state, data = excluded.data, "
+                "updated_at = excluded.updated_at",
+                upserts,
+            )
+            self.__connection.executemany("DELETE FROM fsm WHERE key = ?", deletes)
+
+    def __delete_expired(self, border: float) -> int:
+        with self.__connection:
+            return self.__connection.execute("DELETE FROM fsm WHERE updated_at < ?", (border,)).rowcount
+
+    def __is_expired(self, record: _Record) -> bool:
+        return record.updated_at < time.time() - self.__ttl
+
+    def __remember(self, key: str, record: _Record) -> None:
+        self.__records[key] = record
+        self.__records.move_to_end(key)
+        if len(self.__records) <= self.__max_entries:
+            return
+        for old_key in list(self.__records):
+            if len(self.__records) <= self.__max_entries:
+                break
+            if old_key not in self.__dirty:
+                del self.__records[old_key]
+
+    async def __load(self, key: StorageKey) -> tuple[str, _Record]:
+        built_key: str = self.__key_builder.build(key)
+        record: _Record | None = self.__records.get(built_key)
+        if record is None or (self.__shared and built_key not in self.__dirty):
+            record = await self.__execute(self.__select, built_key)
+            if record is None:
+                record = _Record()
+            self.__remember(built_key, record)
+        else:
+            self.__records.move_to_end(built_key)
+        if self.__is_expired(record):
+            self.__expired += 1
+            record = _Record()
+            self.__remember(built_key, record)
+        return built_key, record
+
+    def __mark_dirty(self, key: str, record: _Record) -> None:
+        record.updated_at = time.time()
+        self.__dirty.add(key)
+        self.__remember(key, record)
+
+    async def flush(self) -> None:
+        """Записывает накопленные изменения одной транзакцией."""
+        if not self.__dirty:
+            return
+        dirty: set[str] = self.__dirty
+        self.__dirty = set()
+        upserts: list[tuple] = []
+        deletes: list[tuple] = []
+        for key in dirty:
+            record: _Record | None = self.__records.get(key)
+            if record is None or record.is_empty():
+                deletes.append((key,))
+            else:
+                upserts.append((key, record.state, json.dumps(record.data, ensure_ascii=False), record.updated_at))
+        try:
+            await self.__execute(self.__write, upserts, deletes)
+        except sqlite3.Error as e:
+            logging.error("Не удалось записать состояния FSM: %s", e)
+            self.__dirty |= dirty
+            return
+        self.__flushes += 1
+        self.__written += len(dirty)
+
+    async def __run(self) -> None:
+        last_sweep: float = time.monotonic()
+        while True:
+            await asyncio.sleep(self.__flush_interval)
+            await self.flush()
+            if time.monotonic() - last_sweep >= min(self.__ttl, self.DEFAULT_SWEEP_INTERVAL):
+                last_sweep = time.monotonic()
+                border: float = time.time() - self.__ttl
+                with suppress(sqlite3.Error):
+                    self.__expired += await self.__execute(self.__delete_expired, border)
+                for key in [key for key, record in self.__records.items() if record.updated_at < border]:
+                    if key not in self.__dirty:
+                        del self.__records[key]
+
+    async def start(self) -> None:
+        self.__flusher = asyncio.create_task(self.__run())
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        built_key, record = await self.__load(key)
+        record.state = state.state if isinstance(state, State) else state
+        self.__mark_dirty(built_key, record)
+
+    async def get_state(self, key: StorageKey) -> str | None:
+        _, record = await self.__load(key)
+        return record.state
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        built_key, record = await self.__load(key)
+        record.data = dict(data)
+        self.__mark_dirty(built_key, record)
+
+    async def get_data(self, key: StorageKey) -> dict[str, Any]:
+        _, record = await self.__load(key)
+        return dict(record.data)
+
+    async def close(self) -> None:
+        if self.__flusher is not None:
+            self.__flusher.cancel()
+            with suppress(asyncio.CancelledError):
+                await self.__flusher
+            self.__flusher = None
+        await self.flush()
+        self.__connection.close()
+
+    def get_stats(self) -> dict:
+        return {
+            "entries": len(self.__records),
+            "dirty": len(self.__dirty),
+            "flushes": self.__flushes,
+            "written": self.__written,
+            "expired": self.__expired,
+        }
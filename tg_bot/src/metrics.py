@@ -0,0 +1,51 @@
+import logging
+from typing import Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware
+from aiogram.dispatcher.event.handler import HandlerObject
+from aiogram.types import TelegramObject
+from aiohttp import web
+
+from utils.metrics import REGISTRY, Instrument
+from utils.tracing import trace_context
+
+HANDLERS: Instrument = Instrument("handler", "Обработчики обновлений", ("handler",))
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """Замеряет время работы каждого обработчика aiogram и начинает для него новую трассировку."""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        handler_object: HandlerObject | None = data.get("handler")
+        name: str = getattr(handler_object.callback, "__qualname__", "unknown") if handler_object else "unknown"
+        with trace_context(), HANDLERS.track(handler=name):
+            return await handler(event, data)
+
+
+class MetricsServer:
+    """HTTP сервер, отдающий метрики бота в текстовом формате Prometheus."""
+
+    def __init__(self, host: str, port: int, path: str = "/metrics") -> None:
+        self.__host: str = host
+        self.__port: int = port
+        self.__app: web.Application = web.Application()
+        self.__app.router.add_get(path, self.__get_metrics)
+        self.__runner: web.AppRunner | None = None
+
+    async def __get_metrics(self, _: web.Request) -> web.Response:
+        return web.Response(text=REGISTRY.render(), content_type="text/plain", charset="utf-8")
+
+    async def start(self) -> None:
+        self.__runner = web.AppRunner(self.__app)
+        await self.__runner.setup()
+        await web.TCPSite(self.__runner, self.__host, self.__port).start()
+        logging.info("Метрики доступны на порту %s", self.__port)
+
+    async def close(self) -> None:
+        if self.__runner is not None:
+            await self.__runner.cleanup()
@@ -0,0 +1,305 @@
+import asyncio
+import itertools
+import logging
+import time
+from collections import deque
+from contextlib import contextmanager, suppress
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Iterator
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import TelegramMethod
+from aiogram.methods.base import Response, TelegramType
+
+from utils.tracing import span
+
+PRIORITY_INTERACTIVE: int = 0
+PRIORITY_BULK: int = 1
+
+_priority: ContextVar[int] = ContextVar("send_priority", default=PRIORITY_INTERACTIVE)
+
+
+class TokenBucket:
+    """Ведро токенов с возможностью принудительной паузы после ``retry_after``."""
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.__rate: float = rate
+        self.__capacity: float = capacity
+        self.__tokens: float = capacity
+        self.__updated_at: float = time.monotonic()
+        self.__paused_until: float = 0.0
+
+    def __refill(self, now: float) -> None:
+        self.__tokens = min(self.__capacity, self.__tokens + (now - self.__updated_at) * self.__rate)
+        self.__updated_at = now
+
+    def get_delay(self) -> float:
+        """Сколько секунд ждать до появления токена."""
+        now: float = time.monotonic()
+        self.__refill(now)
+        delay: float = 0.0 if self.__tokens >= 1 else (1 - self.__tokens) / self.__rate
+        return max(delay, self.__paused_until - now)
+
+    def consume(self) -> None:
+        self.__refill(time.monotonic())
+        self.__tokens -= 1
+
+    def pause(self, seconds: float) -> None:
+        self.__paused_until = max(self.__paused_until, time.monotonic() + seconds)
+        self.__tokens = min(self.__tokens, 0.0)
+
+    def is_idle(self) -> bool:
+        now: float = time.monotonic()
+        self.__refill(now)
+        return self.__tokens >= self.__capacity and self.__paused_until <= now
+
+
+@dataclass(order=True)
+class _SendJob:
+    priority: int
+    seq: int
+    chat_id: Any = field(compare=False)
+    make_request: NextRequestMiddlewareType = field(compare=False)
+    bot: Bot = field(compare=False)
+    method: TelegramMethod = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+    enqueued_at: float = field(compare=False)
+    retries: int = field(default=0, compare=False)
+
+
+class SendScheduler(BaseRequestMiddleware):
+    """Очередь исходящих запросов к Telegram с учётом ограничений на частоту.
+
+    Перехватывает все методы, адресованные чату, и отправляет их через общее ведро токенов
+    и ведро каждого чата. Ответы на действия пользователя идут раньше массовых рассылок,
+    помеченных через :meth:`bulk`. Запросы одного чата выполняются строго по очереди, по одному,
+    поэтому сообщения приходят в порядке отправки. Следующие запросы чата отправляются той же задачей
+    подряд, пока хватает токенов, иначе чат возвращается в общую очередь; если чат ещё ограничен,
+    запрос откладывается, не задерживая остальные чаты. После ``TelegramRetryAfter`` на паузу
+    ставится чат, а общее ведро только если ограничение за последние секунды получили
+    ``GLOBAL_LIMIT_CHATS`` разных чатов, то есть оно действует на весь бот; запрос повторяется.
+    """
+
+    DEFAULT_GLOBAL_RATE: float = 30.0
+    DEFAULT_CHAT_RATE: float = 1.0
+    DEFAULT_CHAT_BURST: float = 3.0
+    DEFAULT_MAX_RETRIES: int = 3
+    MAX_IDLE_BUCKETS: int = 10000
+    GLOBAL_LIMIT_CHATS: int = 2
+
+    def __init__(
+        self,
+        global_rate: float = DEFAULT_GLOBAL_RATE,
+        chat_rate: float = DEFAULT_CHAT_RATE,
+        chat_burst: float = DEFAULT_CHAT_BURST,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+    ) -> None:
+        self.__global_bucket: TokenBucket = TokenBucket(global_rate, global_rate)
+        self.__chat_rate: float = chat_rate
+        self.__chat_burst: float = chat_burst
+        self.__max_retries: int = max_retries
+        self.__chat_buckets: dict[Any, TokenBucket] = {}
+        # В общей очереди только первый запрос каждого чата, остальные ждут своей очереди в чате
+        self.__queue: asyncio.PriorityQueue[_SendJob] = asyncio.PriorityQueue()
+        self.__chat_jobs: dict[Any, deque[_SendJob]] = {}
+        self.__seq: Iterator[int] = itertools.count()
+        self.__deferred: int = 0
+        self.__worker: asyncio.Task | None = None
+        self.__sending: set[asyncio.Task] = set()
+        # Чаты с действующим ограничением Telegram и время его окончания
+        self.__limited_chats: dict[Any, float] = {}
+
+        self.__sent: int = 0
+        self.__failed: int = 0
+        self.__retried: int = 0
+        self.__global_pauses: int = 0
+        self.__dispatched: int = 0
+        self.__wait_total: float = 0.0
+        self.__wait_max: float = 0.0
+
+    @staticmethod
+    @contextmanager
+    def bulk() -> Iterator[None]:
+        """Помечает запросы внутри блока как массовую рассылку с низким приоритетом."""
+        token = _priority.set(PRIORITY_BULK)
+        try:
+            yield
+        finally:
+            _priority.reset(token)
+
+    async def __call__(
+        self, make_request: NextRequestMiddlewareType[TelegramType], bot: Bot, method: TelegramMethod[TelegramType]
+    ) -> Response[TelegramType]:
+        chat_id: Any = getattr(method, "chat_id", None)
+        if chat_id is None or self.__worker is None:
+            return await make_request(bot, method)
+
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        job: _SendJob = _SendJob(
+            _priority.get(), next(self.__seq), chat_id, make_request, bot, method, future, time.monotonic()
+        )
+        jobs: deque[_SendJob] | None = self.__chat_jobs.get(chat_id)
+        if jobs is None:
+            self.__chat_jobs[chat_id] = deque((job,))
+            self.__queue.put_nowait(job)
+        else:
+            jobs.append(job)
+        with span("telegram_send"):
+            return await future
+
+    def __next_job(self, chat_id: Any) -> _SendJob | None:
+        """Убирает завершённый первый запрос чата и возвращает следующий."""
+        jobs: deque[_SendJob] | None = self.__chat_jobs.get(chat_id)
+        if jobs:
+            jobs.popleft()
+        while jobs and jobs[0].future.done():
+            jobs.popleft()
+        if jobs:
+            return jobs[0]
+        self.__chat_jobs.pop(chat_id, None)
+        return None
+
+    def __advance(self, chat_id: Any) -> None:
+        """Ставит в общую очередь следующий запрос чата."""
+        job: _SendJob | None = self.__next_job(chat_id)
+        if job is not None:
+            self.__queue.put_nowait(job)
+
+    def __dispatch(self, job: _SendJob) -> None:
+        self.__global_bucket.consume()
+        self.__get_chat_bucket(job.chat_id).consume()
+        if job.retries == 0:
+            # Время ожидания в очереди, без самой отправки и повторов
+            wait: float = time.monotonic() - job.enqueued_at
+            self.__dispatched += 1
+            self.__wait_total += wait
+            self.__wait_max = max(self.__wait_max, wait)
+
+    def __can_continue(self, job: _SendJob) -> bool:
+        """Можно ли сразу отправить следующий запрос чата, не возвращая его в общую очередь."""
+        if self.__get_chat_bucket(job.chat_id).get_delay() > 0 or self.__global_bucket.get_delay() > 0:
+            return False
+        # Массовая рассылка не занимает токены, которых ждут ответы пользователям
+        return job.priority == PRIORITY_INTERACTIVE or self.__queue.empty()
+
+    def __on_retry_after(self, chat_id: Any, retry_after: float) -> None:
+        self.__get_chat_bucket(chat_id).pause(retry_after)
+        now: float = time.monotonic()
+        self.__limited_chats = {key: until for key, until in self.__limited_chats.items() if until > now}
+        self.__limited_chats[chat_id] = now + retry_after
+        if len(self.__limited_chats) >= self.GLOBAL_LIMIT_CHATS:
+            self.__global_pauses += 1
+            self.__global_bucket.pause(retry_after)
+
+    def __get_chat_bucket(self, chat_id: Any) -> TokenBucket:
+        bucket: TokenBucket | None = self.__chat_buckets.get(chat_id)
+        if bucket is None:
+            if len(self.__chat_buckets) >= self.MAX_IDLE_BUCKETS:
+                self.__chat_buckets = {key: value for key, value in self.__chat_buckets.items() if not value.is_idle()}
+            bucket = TokenBucket(self.__chat_rate, self.__chat_burst)
+            self.__chat_buckets[chat_id] = bucket
+        return bucket
+
+    def __defer(self, job: _SendJob, delay: float) -> None:
+        def requeue() -> None:
+            self.__deferred -= 1
+            if self.__worker is None:
+                job.future.cancel()
+                return
+            self.__queue.put_nowait(job)
+
+        self.__deferred += 1
+        asyncio.get_running_loop().call_later(delay, requeue)
+
+    async def __send(self, job: _SendJob) -> bool:
+        """Выполняет запрос; False, если он отложен для повтора и остаётся первым в очереди чата."""
+        try:
+            result = await job.make_request(job.bot, job.method)
+        except TelegramRetryAfter as e:
+            self.__on_retry_after(job.chat_id, e.retry_after)
+            if job.retries < self.__max_retries:
+                job.retries += 1
+                self.__retried += 1
+                logging.warning("Ограничение Telegram для чата %s, повтор через %s с", job.chat_id, e.retry_after)
+                # Запрос остаётся первым в очереди чата, следующие ждут его повтора
+                self.__defer(job, e.retry_after)
+                return False
+            self.__failed += 1
+            if not job.future.done():
+                job.future.set_exception(e)
+        except Exception as e:
+            self.__failed += 1
+            if not job.future.done():
+                job.future.set_exception(e)
+        else:
+            self.__sent += 1
+            if not job.future.done():
+                job.future.set_result(result)
+        return True
+
+    async def __send_chat(self, job: _SendJob) -> None:
+        """Отправляет запросы чата подряд, пока хватает токенов."""
+        while await self.__send(job):
+            next_job: _SendJob | None = self.__next_job(job.chat_id)
+            if next_job is None:
+                return
+            if not self.__can_continue(next_job):
+                self.__queue.put_nowait(next_job)
+                return
+            self.__dispatch(next_job)
+            job = next_job
+
+    async def __run(self) -> None:
+        while True:
+            job: _SendJob = await self.__queue.get()
+            if job.future.done():
+                self.__advance(job.chat_id)
+                continue
+
+            chat_delay: float = self.__get_chat_bucket(job.chat_id).get_delay()
+            if chat_delay > 0:
+                self.__defer(job, chat_delay)
+                continue
+
+            global_delay: float = self.__global_bucket.get_delay()
+            if global_delay > 0:
+                await asyncio.sleep(global_delay)
+            self.__dispatch(job)
+
+            task: asyncio.Task = asyncio.create_task(self.__send_chat(job))
+            self.__sending.add(task)
+            task.add_done_callback(self.__sending.discard)
+
+    async def start(self) -> None:
+        self.__worker = asyncio.create_task(self.__run())
+
+    async def close(self) -> None:
+        if self.__worker is not None:
+            self.__worker.cancel()
+            with suppress(asyncio.CancelledError):
+                await self.__worker
+            self.__worker = None
+        await asyncio.gather(*self.__sending, return_exceptions=True)
+        for jobs in self.__chat_jobs.values():
+            for job in jobs:
+                job.future.cancel()
+        self.__chat_jobs.clear()
+        while not self.__queue.empty():
+            self.__queue.get_nowait()
+
+    def get_stats(self) -> dict:
+        return {
+            "queued": sum(len(jobs) for jobs in self.__chat_jobs.values()),
+            "chats": len(self.__chat_jobs),
+            "deferred": self.__deferred,
+            "sending": len(self.__sending),
+            "sent": self.__sent,
+            "failed": self.__failed,
+            "retried": self.__retried,
+            "global_pauses": self.__global_pauses,
+            "avg_wait": self.__wait_total / self.__dispatched if self.__dispatched else 0.0,
+            "max_wait": self.__wait_max,
+        }
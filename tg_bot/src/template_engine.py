@@ -8,8 +8,10 @@
 
 Основные функции:
 - Инициализация среды шаблонов
-- Загрузка шаблонов из файловой системы
+- Компиляция всех шаблонов при запуске с кэшем байткода на диске
 - Рендеринг шаблонов с передачей данных
+- Запоминание результата шаблонов без данных
+- Вынос долгого рендеринга в отдельный поток и учёт времени рендеринга
 
 Компоненты:
     AbstractTemplateEngine: Абстрактный интерфейс движка шаблонов
@@ -21,9 +23,14 @@
 """
 
 import abc
+import asyncio
 import logging
+import time
+from pathlib import Path
 from typing import Optional
-from jinja2 import Environment, Template, FileSystemLoader, TemplateNotFound
+from jinja2 import Environment, Template, FileSystemLoader, FileSystemBytecodeCache, TemplateNotFound, meta
+
+from utils.tracing import span
 
 
 class AbstractTemplateEngine(abc.ABC):
@@ -67,21 +74,88 @@ class TemplateEngine(AbstractTemplateEngine):
     """
     Конкретная реализация движка шаблонов с использованием Jinja2.
 
+    Все шаблоны ``.tfb`` компилируются при создании движка. Шаблоны без переменных
+    рендерятся один раз, а шаблоны, чей средний рендеринг дольше ``offload_threshold``,
+    рендерятся в отдельном потоке, чтобы не блокировать цикл событий бота.
+
     :param templates_folder_path: Путь к папке с шаблонами
+    :param cache_path: Папка для кэша байткода, по умолчанию кэш не используется
+    :param offload_threshold: Среднее время рендеринга в секундах, после которого рендеринг выносится в поток
     :type templates_folder_path: str
+    :type cache_path: Optional[str]
+    :type offload_threshold: float
     :returns: Инициализированный экземпляр движка шаблонов
     :rtype: TemplateEngine
     """
 
-    def __init__(self, templates_folder_path: str) -> None:
+    EXTENSIONS: tuple[str, ...] = ("tfb",)
+    DEFAULT_OFFLOAD_THRESHOLD: float = 0.005
+
+    def __init__(
+        self,
+        templates_folder_path: str,
+        cache_path: Optional[str] = None,
+        offload_threshold: float = DEFAULT_OFFLOAD_THRESHOLD,
+    ) -> None:
         """
-        Инициализация движка шаблонов.
+        Инициализация движка шаблонов и компиляция всех шаблонов.
 
         :param templates_folder_path: Путь к директории с шаблонами
+        :param cache_path: Папка для кэша байткода
+        :param offload_threshold: Порог среднего времени рендеринга для выноса в поток
         :type templates_folder_path: str
+        :type cache_path: Optional[str]
+        :type offload_threshold: float
         """
         logging.debug("Инициализация TemplateEngine")
-        self.__environment = Environment(loader=FileSystemLoader(templates_folder_path))
+        bytecode_cache: FileSystemBytecodeCache | None = None
+        if cache_path is not None:
+            Path(cache_path).mkdir(parents=True, exist_ok=True)
+            bytecode_cache = FileSystemBytecodeCache(cache_path)
+        self.__environment = Environment(
+            loader=FileSystemLoader(templates_folder_path),
+            bytecode_cache=bytecode_cache,
+            auto_reload=False,
+        )
+        self.__offload_threshold: float = offload_threshold
+        self.__templates: dict[str, Template] = {}
+        self.__static: dict[str, str] = {}
+        self.__timings: dict[str, list[float]] = {}
+        self.__compile_all()
+
+    def __compile_all(self) -> None:
+        """Компилирует все шаблоны и сразу рендерит те, что не используют переменных."""
+        started: float = time.perf_counter()
+        for name in self.__environment.list_templates(extensions=self.EXTENSIONS):
+            template: Template = self.__environment.get_template(name)
+            self.__templates[name] = template
+            source: str = self.__environment.loader.get_source(self.__environment, name)[0]  # type: ignore
+            if not meta.find_undeclared_variables(self.__environment.parse(source)):
+                self.__static[name] = template.render()
+        logging.info(
+            "Скомпилировано шаблонов: %s, из них статических: %s за %.3f с",
+            len(self.__templates),
+            len(self.__static),
+            time.perf_counter() - started,
+        )
+
+    def __get_template(self, template_path: str) -> Template:
+        template: Template | None = self.__templates.get(template_path)
+        if template is None:
+            template = self.__environment.get_template(template_path)
+            self.__templates[template_path] = template
+        return template
+
+    def __record(self, template_path: str, elapsed: float) -> None:
+        # [количество, суммарное время, максимальное время]
+        timing: list[float] = self.__timings.setdefault(template_path, [0, 0.0, 0.0])
+        timing[0] += 1
+        timing[1] += elapsed
+        timing[2] = max(timing[2], elapsed)
+
+    def __is_slow(self, template_path: str) -> bool:
+        timing: list[float] | None = self.__timings.get(template_path)
+        return timing is not None and timing[1] / timing[0] > self.__offload_threshold
 
     async def render(self, template_path: str, data: Optional[dict] = None) -> str:
         """
@@ -97,7 +171,31 @@ class TemplateEngine(AbstractTemplateEngine):
 
         Пример использования:
             engine = TemplateEngine("templates")
-            result = engine.render("welcome.j2", {"name": "John"})
+            result = await engine.render("welcome.j2", {"name": "John"})
+        """
+        static: str | None = self.__static.get(template_path)
+        if static is not None:
+            return static
+
+        template: Template = self.__get_template(template_path)
+        offload: bool = self.__is_slow(template_path)
+        started: float = time.perf_counter()
+        with span("render"):
+            if offload:
+                result: str = await asyncio.to_thread(template.render, data=data)
+            else:
+                result = template.render(data=data)
+        self.__record(template_path, time.perf_counter() - started)
+        return result
+
+    def get_stats(self) -> dict:
+        """
+        Статистика рендеринга по каждому шаблону.
+
+        :return: Количество рендерингов, среднее и максимальное время в секундах
+        :rtype: dict
         """
-        template: Template = self.__environment.get_template(template_path)
-        return template.render(data=data)
+        return {
+            name: {"renders": int(count), "avg": total / count, "max": maximum}
+            for name, (count, total, maximum) in self.__timings.items()
+        }
@@ -0,0 +1,58 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any
+
+from aiogram import Bot, Dispatcher
+from aiohttp import web
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler
+
+
+@dataclass(frozen=True)
+class WebhookSettings:
+    url: str
+    secret_token: str
+    path: str = "/webhook"
+    host: str = "0.0.0.0"
+    port: int = 8080
+    max_concurrency: int = 64
+    drain_timeout: float = 30.0
+
+
+class BoundedRequestHandler(SimpleRequestHandler):
+    """Обработчик вебхука, который отвечает Telegram сразу, а обновления обрабатывает в фоне.
+
+    Одновременно обрабатывается не больше ``max_concurrency`` обновлений. Пока столько уже принято,
+    новые запросы получают 503 без чтения тела, и Telegram доставит их повторно позже,
+    поэтому очередь обновлений в памяти не растёт. Запросы с неверным секретным токеном
+    отклоняются базовым обработчиком.
+    """
+
+    def __init__(self, dispatcher: Dispatcher, bot: Bot, secret_token: str, max_concurrency: int, **data: Any) -> None:
+        super().__init__(dispatcher, bot, handle_in_background=True, secret_token=secret_token, **data)
+        self.__max_concurrency: int = max_concurrency
+        self.__semaphore: asyncio.Semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def handle(self, request: web.Request) -> web.Response:
+        if len(self._background_feed_update_tasks) >= self.__max_concurrency:
+            logging.warning("Обработчик вебхука занят, обновление отклонено до повторной доставки")
+            return web.Response(status=503)
+        return await super().handle(request)
+
+    async def _background_feed_update(self, bot: Bot, update: dict[str, Any]) -> None:
+        async with self.__semaphore:
+            await super()._background_feed_update(bot, update)
+
+    async def drain(self, timeout: float) -> None:
+        """Ждёт завершения уже принятых обновлений перед остановкой."""
+        pending: set[asyncio.Task] = set(self._background_feed_update_tasks)
+        if not pending:
+            return
+        logging.info("Ожидание обработки %s обновлений", len(pending))
+        _, not_done = await asyncio.wait(pending, timeout=timeout)
+        if not_done:
+            logging.warning("Не дождались обработки %s обновлений", len(not_done))
+
+    async def close(self) -> None:
+        # Сессией бота управляет TgBot, она закрывается после остановки всех фоновых задач
+        pass
@@ -1,22 +1,140 @@
+import atexit
+import json
 import logging
+import queue
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler, TimedRotatingFileHandler
 from typing import Self, Optional
 
+from utils.tracing import get_trace_id
+
+FORMAT: str = "%(asctime)s - %(levelname)s - %(message)s"
+
+
+class JsonFormatter(logging.Formatter):
+    """Одна запись журнала на строку в формате JSON, с id трассировки запроса, если он есть."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: dict = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        trace_id: str | None = getattr(record, "trace_id", None)
+        if trace_id:
+            entry["trace_id"] = trace_id
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class ContextFilter(logging.Filter):
+    """Запоминает id трассировки в записи, пока она ещё в потоке, где была создана."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.trace_id = get_trace_id()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Пропускает одно предупреждение с одинаковым шаблоном сообщения за ``interval`` секунд.
+
+    Число отброшенных повторов дописывается к следующему пропущенному сообщению.
+    Ошибки и сообщения других уровней не отбрасываются. Шаблоны старше ``interval`` забываются,
+    а число запомненных шаблонов ограничено ``max_keys``.
+    """
+
+    DEFAULT_MAX_KEYS: int = 1000
+
+    def __init__(self, interval: float, max_keys: int = DEFAULT_MAX_KEYS) -> None:
+        super().__init__()
+        self.__interval: float = interval
+        self.__max_keys: int = max_keys
+        # Шаблон сообщения -> время последней записи и число отброшенных с тех пор повторов,
+        # в порядке времени последней записи
+        self.__seen: OrderedDict[tuple[str, str], list[float]] = OrderedDict()
+
+    def __evict(self, now: float) -> None:
+        while self.__seen:
+            seen: list[float] = next(iter(self.__seen.values()))
+            if now - seen[0] < self.__interval and len(self.__seen) <= self.__max_keys:
+                break
+            self.__seen.popitem(last=False)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno != logging.WARNING or self.__interval <= 0:
+            return True
+        key: tuple[str, str] = (record.name, str(record.msg))
+        now: float = time.monotonic()
+        seen: list[float] | None = self.__seen.get(key)
+        if seen is not None and now - seen[0] < self.__interval:
+            seen[1] += 1
+            return False
+        if seen is not None and seen[1]:
+            record.msg = f"{record.msg} (пропущено похожих сообщений: {int(seen[1])})"
+        self.__seen[key] = [now, 0]
+        self.__seen.move_to_end(key)
+        self.__evict(now)
+        return True
+
 
 class Logger:
+    """Настройка журнала сервиса.
+
+    Обработчики только кладут записи в очередь, в файл и в консоль их пишет отдельный поток,
+    поэтому вызовы журнала не блокируют цикл событий. Файл ротируется по размеру (``max_bytes``)
+    или по времени (``when``, как в ``TimedRotatingFileHandler``).
+    """
+
     _instance: Optional[Self] = None
 
-    def __new__(cls, level: int) -> Self:
+    def __new__(cls, *args, **kwargs) -> Self:
         if not isinstance(cls._instance, cls):
             cls._instance: Optional[Self] = super().__new__(cls)
         return cls._instance
 
-    def __init__(self, level: int) -> None:
-        self.__logging_basic_config(level)
+    def __init__(
+        self,
+        level: int,
+        path: str = "app.log",
+        max_bytes: int = 10 * 1024 * 1024,
+        backup_count: int = 5,
+        when: str | None = None,
+        json_format: bool = False,
+        sample_interval: float = 0.0,
+    ) -> None:
+        if getattr(self, "_Logger__listener", None) is not None:
+            return
+        file_handler: logging.Handler
+        if when:
+            file_handler = TimedRotatingFileHandler(path, when=when, backupCount=backup_count, encoding="utf-8")
+        else:
+            file_handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+        formatter: logging.Formatter = JsonFormatter() if json_format else logging.Formatter(FORMAT)
+        stream_handler: logging.Handler = logging.StreamHandler()
+        for handler in (file_handler, stream_handler):
+            handler.setFormatter(formatter)
+
+        log_queue: queue.SimpleQueue = queue.SimpleQueue()
+        queue_handler: QueueHandler = QueueHandler(log_queue)
+        queue_handler.addFilter(SamplingFilter(sample_interval))
+        queue_handler.addFilter(ContextFilter())
+
+        root: logging.Logger = logging.getLogger()
+        root.setLevel(level)
+        root.handlers = [queue_handler]
+
+        self.__listener: QueueListener | None = QueueListener(log_queue, file_handler, stream_handler)
+        self.__listener.start()
+        atexit.register(self.close)
 
-    @staticmethod
-    def __logging_basic_config(level: int) -> None:
-        logging.basicConfig(
-            level=level,
-            format="%(asctime)s - %(levelname)s - %(message)s",
-            handlers=[logging.FileHandler("app.log", encoding="utf-8"), logging.StreamHandler()],
-        )
+    def close(self) -> None:
+        """Дописывает оставшиеся в очереди записи и останавливает поток записи."""
+        if self.__listener is not None:
+            self.__listener.stop()
+            for handler in self.__listener.handlers:
+                handler.close()
+            self.__listener = None